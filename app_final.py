@@ -1,46 +1,32 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog, filedialog
-import json
+from tkinter import font as tkfont
+import bisect
 import os
 import random
-import copy
 import sys
-import reportlab.lib.pagesizes as pagesizes
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet
+import threading
+from quiz_bank import (QUESTIONS_FILE, SAVED_ORDER_FILE, BankJournal, answer_warnings, apply_ops, format_items,
+                       read_journal, read_questions, write_questions, write_sample_questions)
+from quiz_history import History, describe
+from quiz_import import FORMATS, merge_banks
+from quiz_pdf import ExportCancelled, ExportProgress, render_single_pdf, render_versions_pdf, render_versions_dir
+from quiz_profile import profiled, stage
+from quiz_search import SearchIndex
+from quiz_versions import (StratifiedSampler, check_fingerprint, freeze_bank, generate_balanced_version,
+                           generate_balanced_versions, generate_version, generate_versions, new_master_seed,
+                           regenerate_versions)
+from quiz_watch import BankWatcher, diff_banks, file_stamp
 
 
-def resource_path(relative_path: str) -> str:
-    """
-    Devuelve la ruta absoluta al recurso, considerando si la app está
-    empaquetada con PyInstaller (sys._MEIPASS) o ejecutándose desde el código fuente.
-    """
-    # cuando PyInstaller empaqueta, crea sys._MEIPASS
-    if hasattr(sys, "_MEIPASS"):
-        base_path = sys._MEIPASS
-    else:
-        
-        base_path = os.path.dirname(os.path.abspath(__file__))
-    return os.path.join(base_path, relative_path)
-
-
-BASE_DIR = resource_path("")
-
-
-QUESTIONS_FILE = resource_path("questions.json")
-SAVED_ORDER_FILE = resource_path("questions_saved_order.json")
-LOGO_FILE = resource_path("univalle_logo.png")
-
 pdf_title = "Cuestionario - Estado actual"
 
-SAMPLE_QUESTIONS = [
-    {"pregunta": "¿Cuál es la capital de Francia?",
-     "opciones": ["París", "Londres", "Roma", "Berlín"], "respuesta": "París"},
-    {"pregunta": "¿Cuál es el océano más grande del mundo?",
-     "opciones": ["Atlántico", "Índico", "Pacífico", "Ártico"], "respuesta": "Pacífico"},
-    {"pregunta": "¿Cuánto es 5 * 3?",
-     "opciones": ["8", "15", "10", "20"], "respuesta": "15"}
-]
+# procesos usados al generar el PDF de versiones (pypdf es necesario para unir las partes)
+PDF_WORKERS = os.cpu_count() or 1
+# cada cuánto la interfaz consulta el avance de una exportación en segundo plano
+EXPORT_POLL_MS = 150
+# cada cuánto se consulta si questions.json cambió por fuera (con "Vigilar JSON" activo)
+WATCH_POLL_MS = 1000
 
 
 def safe_show_error(title, msg):
@@ -85,41 +71,20 @@ def safe_show_warning(title, msg):
 def ensure_questions(path=QUESTIONS_FILE):
     if not os.path.exists(path):
         try:
-            with open(path, "w", encoding="utf-8") as f:
-                json.dump(SAMPLE_QUESTIONS, f, ensure_ascii=False, indent=2)
+            write_sample_questions(path)
         except Exception as e:
             safe_show_error("Error", f"No se pudo crear {path}:\n{e}")
 
 
 def load_questions(path=QUESTIONS_FILE):
-
+    """Lee el banco mostrando los errores en diálogos; None si no se pudo leer o validar."""
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            raw = json.load(f)
-
-        if not isinstance(raw, list):
-            raise ValueError("El JSON debe contener una lista de preguntas")
-
-        normalized = []
-        for item in raw:
-            if isinstance(item, dict):
-                pregunta = item.get("pregunta") or item.get("question") or ""
-                opciones = item.get("opciones") or item.get("options") or []
-                respuesta = item.get("respuesta") or item.get("answer") or ""
-                if not isinstance(opciones, list):
-                    opciones = list(opciones) if opciones is not None else []
-                if not pregunta or not isinstance(opciones, list) or len(opciones) < 2:
-                    raise ValueError("Cada pregunta debe tener 'pregunta' (o 'question') y al menos 2 'opciones' (o 'options')")
-                if not respuesta:
-                    respuesta = opciones[0]
-                normalized.append({
-                    "pregunta": pregunta,
-                    "opciones": opciones,
-                    "respuesta": respuesta
-                })
-            else:
-                raise ValueError("Formato inválido: cada elemento debe ser un objeto (dict)")
-        return normalized
+        questions = read_questions(path)
+        warnings = answer_warnings(questions)
+        if warnings:
+            safe_show_warning("Aviso", f"{len(warnings)} pregunta(s) con la respuesta fuera de las opciones "
+                                       f"(se conservan; en la clave salen como N/A):\n{format_items(warnings)}")
+        return questions
 
     except FileNotFoundError:
         safe_show_warning("Aviso", f"No se encontró {path}. Se creará un archivo de ejemplo.")
@@ -127,232 +92,18 @@ def load_questions(path=QUESTIONS_FILE):
         return load_questions(path)
     except Exception as e:
         safe_show_error("Error al cargar preguntas", str(e))
-        return []
+        return None
 
 
 def save_questions_to_file(questions, path=QUESTIONS_FILE):
     try:
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(questions, f, ensure_ascii=False, indent=2)
+        write_questions(questions, path)
         return True
     except Exception as e:
         safe_show_error("Error al guardar", str(e))
         return False
 
 
-def export_single_pdf(questions, filepath, title="Cuestionario"):
-    try:
-
-        from reportlab.lib import colors
-        from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
-        from reportlab.platypus import Paragraph, Spacer, SimpleDocTemplate, PageBreak
-        from reportlab.lib.units import inch
-
-        styles = getSampleStyleSheet()
-        question_style = ParagraphStyle(
-            'QuestionStyle',
-            parent=styles['Normal'],
-            fontName='Helvetica-Bold',
-            fontSize=12,
-            spaceAfter=6,
-            textColor=colors.darkblue
-        )
-        option_style = ParagraphStyle(
-            'OptionStyle',
-            parent=styles['Normal'],
-            fontName='Helvetica',
-            fontSize=11,
-            leftIndent=20
-        )
-        answer_style = ParagraphStyle(
-            'AnswerStyle',
-            parent=styles['Normal'],
-            fontName='Helvetica-Oblique',
-            fontSize=10,
-            textColor=colors.darkred
-        )
-        title_style = ParagraphStyle(
-            'TitleStyle',
-            parent=styles['Title'],
-            alignment=1
-        )
-
-        def header_footer(cnv, doc):
-            cnv.saveState()
-            width, height = pagesizes.letter
-            logo_path = os.path.join(BASE_DIR, "univalle_logo.png")
-            try:
-                cnv.drawImage(logo_path, 40, height - 90, width=70, height=70, preserveAspectRatio=True, mask='auto')
-            except Exception:
-                cnv.setFont('Helvetica-Oblique', 8)
-                cnv.drawString(40, height - 40, "[Logo no encontrado]")
-
-            header_text = (
-                "UNIVERSIDAD DEL VALLE SEDE YUMBO\n"
-                "TECNOLOGÍA EN DESARROLLO DE SOFTWARE\n"
-                "Matemáticas Discretas II\n"
-                "Código: 750005C - gustavo.neira@correounivalle.edu.co Docente: Gustavo Neira"
-            )
-            cnv.setFont("Helvetica-Bold", 9)
-            text_y = height - 45
-            for line in header_text.split("\n"):
-                cnv.drawCentredString(width / 2 + 40, text_y, line.strip())
-                text_y -= 12
-
-            cnv.setStrokeColor(colors.black)
-            cnv.setLineWidth(0.8)
-            cnv.line(40, height - 100, width - 40, height - 100)
-            cnv.setFont("Helvetica", 8)
-            cnv.drawRightString(width - 40, 25, f"Página {doc.page}")
-            cnv.restoreState()
-
-        doc = SimpleDocTemplate(
-            filepath,
-            pagesize=pagesizes.letter,
-            rightMargin=40, leftMargin=40,
-            topMargin=110, bottomMargin=40
-        )
-
-        flow = []
-        flow.append(Paragraph(title, title_style))
-        flow.append(Spacer(1, 12))
-
-        for idx, q in enumerate(questions, start=1):
-            flow.append(Paragraph(f"{idx}. {q['pregunta']}", question_style))
-            for opt_idx, opt in enumerate(q['opciones'], start=1):
-                flow.append(Paragraph(f"{chr(64+opt_idx)}. {opt}", option_style))
-            flow.append(Spacer(1, 6))
-
-        flow.append(PageBreak())
-
-        flow.append(Paragraph("Claves de Respuestas", styles['Heading1']))
-        flow.append(Spacer(1, 12))
-        for idx, q in enumerate(questions, start=1):
-            try:
-                pos = q['opciones'].index(q['respuesta'])
-                letter = chr(65 + pos)
-            except Exception:
-                letter = "N/A"
-            flow.append(Paragraph(f"{idx}. {letter} — {q['respuesta']}", answer_style))
-            flow.append(Spacer(1, 4))
-
-        doc.build(flow, onFirstPage=header_footer, onLaterPages=header_footer)
-        return True
-    except Exception as e:
-        safe_show_error("Error al exportar PDF", str(e))
-        return False
-
-
-def build_versions_pdf(versions_list, filepath, title="Examen - Múltiples versiones"):
-    try:
-        from reportlab.lib import colors
-        from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
-        from reportlab.platypus import Paragraph, Spacer, SimpleDocTemplate, PageBreak
-        from reportlab.lib.units import inch
-
-        styles = getSampleStyleSheet()
-        question_style = ParagraphStyle(
-            'QuestionStyle',
-            parent=styles['Normal'],
-            fontName='Helvetica-Bold',
-            fontSize=12,
-            spaceAfter=6,
-            textColor=colors.darkblue
-        )
-        option_style = ParagraphStyle(
-            'OptionStyle',
-            parent=styles['Normal'],
-            fontName='Helvetica',
-            fontSize=11,
-            leftIndent=20
-        )
-        answer_style = ParagraphStyle(
-            'AnswerStyle',
-            parent=styles['Normal'],
-            fontName='Helvetica-Oblique',
-            fontSize=10,
-            textColor=colors.darkred
-        )
-        title_style = ParagraphStyle(
-            'TitleStyle',
-            parent=styles['Title'],
-            alignment=1  # centered
-        )
-
-        def header_footer(cnv, doc):
-            cnv.saveState()
-            width, height = pagesizes.letter
-            logo_path = os.path.join(BASE_DIR, "univalle_logo.png")
-            try:
-                cnv.drawImage(logo_path, 40, height - 90, width=70, height=70, preserveAspectRatio=True, mask='auto')
-            except Exception:
-                cnv.setFont('Helvetica-Oblique', 8)
-                cnv.drawString(40, height - 40, "[Logo no encontrado]")
-
-            header_text = (
-                "UNIVERSIDAD DEL VALLE SEDE YUMBO\n"
-                "TECNOLOGÍA EN DESARROLLO DE SOFTWARE\n"
-                "Matemáticas Discretas II\n"
-                "Código: 750005C - gustavo.neira@correounivalle.edu.co Docente: Gustavo Neira"
-            )
-            cnv.setFont("Helvetica-Bold", 9)
-            text_y = height - 45
-            for line in header_text.split("\n"):
-                cnv.drawCentredString(width / 2 + 40, text_y, line.strip())
-                text_y -= 12
-
-            cnv.setStrokeColor(colors.black)
-            cnv.setLineWidth(0.8)
-            cnv.line(40, height - 100, width - 40, height - 100)
-            cnv.setFont("Helvetica", 8)
-            cnv.drawRightString(width - 40, 25, f"Página {doc.page}")
-            cnv.restoreState()
-
-        doc = SimpleDocTemplate(
-            filepath,
-            pagesize=pagesizes.letter,
-            rightMargin=40, leftMargin=40,
-            topMargin=110, bottomMargin=40
-        )
-
-        flow = []
-
-        flow.append(Paragraph(title, title_style))
-        flow.append(Spacer(1, 12))
-
-        for ver_num, questions in versions_list:
-            flow.append(Paragraph(f"Versión {ver_num}", styles['Heading2']))
-            flow.append(Spacer(1, 8))
-            for idx, q in enumerate(questions, start=1):
-                flow.append(Paragraph(f"{idx}. {q['pregunta']}", question_style))
-                for opt_idx, opt in enumerate(q['opciones'], start=1):
-                    flow.append(Paragraph(f"{chr(64+opt_idx)}. {opt}", option_style))
-                flow.append(Spacer(1, 6))
-
-            flow.append(PageBreak())
-
-        flow.append(Paragraph("Claves de respuestas", styles['Heading1']))
-        flow.append(Spacer(1, 12))
-
-        for ver_num, questions in versions_list:
-            flow.append(Paragraph(f"Clave - Versión {ver_num}", styles['Heading2']))
-            flow.append(Spacer(1, 8))
-            for idx, q in enumerate(questions, start=1):
-                try:
-                    pos = q['opciones'].index(q['respuesta'])
-                    letter = chr(65 + pos)
-                except Exception:
-                    letter = "N/A"
-                flow.append(Paragraph(f"{idx}. {letter} — {q.get('respuesta','')}", answer_style))
-            flow.append(PageBreak())
-
-        doc.build(flow, onFirstPage=header_footer, onLaterPages=header_footer)
-        return True
-    except Exception as e:
-        safe_show_error("Error al generar PDF de versiones", str(e))
-        return False
-
-
 def cambiar_titulo_pdf():
     global pdf_title
     nuevo_titulo = simpledialog.askstring(
@@ -367,13 +118,130 @@ def cambiar_titulo_pdf():
         safe_show_warning("Sin cambios", "No se modificó el título.")
 
 
+class VirtualListbox(ttk.Frame):
+    """
+    Lista que solo contiene las filas visibles. El texto de cada fila se pide
+    a row_text(i) al desplazarse o redibujar, así que actualizar, seleccionar
+    o desplazarse cuesta O(filas visibles) y no O(tamaño del banco).
+    command(i) se llama cuando el usuario selecciona la fila absoluta i.
+    """
+
+    def __init__(self, parent, row_text, command, width=46, height=34):
+        super().__init__(parent)
+        self.row_text = row_text
+        self.command = command
+        self.count = 0
+        self.first = 0
+        self.rows = height
+        self.selected = None
+
+        self.lb = tk.Listbox(self, width=width, height=height, exportselection=False)
+        self.sb = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.on_scroll)
+        self.sb.pack(side=tk.RIGHT, fill=tk.Y)
+        self.lb.pack(side=tk.LEFT, fill=tk.Y, expand=True)
+
+        self.lb.bind('<<ListboxSelect>>', self._on_select)
+        self.lb.bind('<Configure>', self._on_resize)
+        self.lb.bind('<MouseWheel>', self._on_wheel)
+        self.lb.bind('<Button-4>', self._on_wheel)
+        self.lb.bind('<Button-5>', self._on_wheel)
+        self.lb.bind('<Up>', lambda e: self._step(-1))
+        self.lb.bind('<Down>', lambda e: self._step(1))
+
+    def set_count(self, count):
+        """Cambia el número total de filas y redibuja la ventana visible."""
+        self.count = count
+        if self.selected is not None and self.selected >= count:
+            self.selected = None
+        self._scroll_to(self.first)
+
+    def refresh_rows(self, indices):
+        """Vuelve a pedir el texto solo de las filas indicadas que estén visibles."""
+        for i in indices:
+            if self.first <= i < self.first + self.rows and i < self.count:
+                pos = i - self.first
+                self.lb.delete(pos)
+                self.lb.insert(pos, self.row_text(i))
+        self._show_selection()
+
+    def select(self, idx):
+        """Marca la fila idx como seleccionada y la hace visible (None = ninguna)."""
+        self.selected = idx
+        if idx is None:
+            self._show_selection()
+        elif idx < self.first:
+            self._scroll_to(idx)
+        elif idx >= self.first + self.rows:
+            self._scroll_to(idx - self.rows + 1)
+        else:
+            self._show_selection()
+
+    def on_scroll(self, action, amount, unit=None):
+        if action == 'moveto':
+            self._scroll_to(int(float(amount) * self.count))
+        elif action == 'scroll':
+            step = self.rows if unit == 'pages' else 1
+            self._scroll_to(self.first + int(amount) * step)
+
+    def _scroll_to(self, first):
+        self.first = max(0, min(first, self.count - self.rows))
+        last = min(self.first + self.rows, self.count)
+        self.lb.delete(0, tk.END)
+        if last > self.first:
+            self.lb.insert(tk.END, *[self.row_text(i) for i in range(self.first, last)])
+        if self.count:
+            self.sb.set(self.first / self.count, last / self.count)
+        else:
+            self.sb.set(0, 1)
+        self._show_selection()
+
+    def _show_selection(self):
+        self.lb.selection_clear(0, tk.END)
+        if self.selected is not None and self.first <= self.selected < self.first + self.rows:
+            self.lb.selection_set(self.selected - self.first)
+
+    def _on_select(self, event):
+        sel = self.lb.curselection()
+        if sel:
+            self.selected = self.first + sel[0]
+            self.command(self.selected)
+
+    def _on_resize(self, event):
+        pad = 2 * (int(self.lb.cget('borderwidth')) + int(self.lb.cget('highlightthickness')))
+        line = tkfont.nametofont(self.lb.cget('font')).metrics('linespace')
+        rows = max(1, (event.height - pad) // line)
+        if rows != self.rows:
+            self.rows = rows
+            self._scroll_to(self.first)
+
+    def _on_wheel(self, event):
+        if event.num == 4 or (event.num != 5 and event.delta > 0):
+            self._scroll_to(self.first - 3)
+        else:
+            self._scroll_to(self.first + 3)
+        return "break"
+
+    def _step(self, delta):
+        if self.count:
+            current = self.selected if self.selected is not None else self.first
+            self.command(max(0, min(current + delta, self.count - 1)))
+        return "break"
+
+
 class QuizApp(tk.Tk):
     def __init__(self):
         super().__init__()
         self.title("Quiz Interactivo - Versión Final")
         self.geometry("980x640")
         ensure_questions()
-        self.questions = load_questions()
+        loaded = load_questions()
+        # si el banco no se pudo cargar, questions.json no se toca (ni diario ni
+        # compactación) hasta que el usuario acepte sobrescribirlo
+        self.bank_loaded = loaded is not None
+        self.overwrite_declined = False
+        self.questions = loaded if loaded is not None else []
+        self.journal = self.open_journal() if self.bank_loaded else None
+        self.history = History()
         self.current_index = 0
 
         top = ttk.Frame(self)
@@ -382,22 +250,64 @@ class QuizApp(tk.Tk):
         ttk.Button(top, text="Mezclar opciones", command=self.shuffle_options).pack(side=tk.LEFT, padx=4)
         ttk.Button(top, text="Exportar PDF (actual)", command=self.export_current_pdf).pack(side=tk.LEFT, padx=4)
         ttk.Button(top, text="Generar versiones (PDF)", command=self.generate_versions_ui).pack(side=tk.LEFT, padx=4)
+        ttk.Button(top, text="Generar versiones (carpeta)", command=self.generate_versions_dir_ui).pack(side=tk.LEFT, padx=4)
+        ttk.Button(top, text="Regenerar versión", command=self.regenerate_version_ui).pack(side=tk.LEFT, padx=4)
+        ttk.Button(top, text="Calificar hojas", command=self.grade_ui).pack(side=tk.LEFT, padx=4)
+        self.balanced_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(top, text="Balanceadas", variable=self.balanced_var).pack(side=tk.LEFT, padx=4)
         ttk.Button(top, text="Guardar orden actual", command=self.save_current_order).pack(side=tk.LEFT, padx=4)
         ttk.Button(top, text="Recargar desde JSON", command=self.reload_from_file).pack(side=tk.LEFT, padx=4)
+        # vigilancia de questions.json: los cambios externos se aplican sin recargar todo
+        self.watcher = None
+        self.syncing = False
+        self.watch_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(top, text="Vigilar JSON", variable=self.watch_var,
+                        command=self.toggle_watch).pack(side=tk.LEFT, padx=4)
+        ttk.Button(top, text="Importar bancos", command=self.import_banks_ui).pack(side=tk.LEFT, padx=4)
+        ttk.Button(top, text="Buscar duplicados", command=self.find_duplicates_ui).pack(side=tk.LEFT, padx=4)
 
         ttk.Button(top, text="Cambiar título del PDF", command=cambiar_titulo_pdf).pack(side=tk.LEFT, padx=8)
 
         ttk.Button(top, text="Añadir pregunta", command=self.add_question_ui).pack(side=tk.RIGHT, padx=6)
         ttk.Button(top, text="Editar pregunta", command=self.edit_question_ui).pack(side=tk.RIGHT, padx=6)
         ttk.Button(top, text="Eliminar pregunta", command=self.delete_question_ui).pack(side=tk.RIGHT, padx=6)
+        ttk.Button(top, text="Rehacer", command=self.redo).pack(side=tk.RIGHT, padx=4)
+        ttk.Button(top, text="Deshacer", command=self.undo).pack(side=tk.RIGHT, padx=4)
+        self.bind('<Control-z>', lambda e: self.undo())
+        self.bind('<Control-y>', lambda e: self.redo())
+        self.bind('<Control-Z>', lambda e: self.redo())
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+
+        # barra de estado de las exportaciones en segundo plano
+        status = ttk.Frame(self)
+        status.pack(side=tk.BOTTOM, fill=tk.X, padx=8, pady=(0, 6))
+        self.export_job = None
+        self.status_var = tk.StringVar(value="")
+        self.cancel_button = ttk.Button(status, text="Cancelar exportación", command=self.cancel_export, state=tk.DISABLED)
+        self.cancel_button.pack(side=tk.RIGHT, padx=4)
+        self.progress_bar = ttk.Progressbar(status, length=200, maximum=100, mode='determinate')
+        self.progress_bar.pack(side=tk.RIGHT, padx=4)
+        ttk.Label(status, textvariable=self.status_var).pack(side=tk.LEFT, fill=tk.X, expand=True)
 
         left = ttk.Frame(self, width=320)
         left.pack(side=tk.LEFT, fill=tk.Y, padx=10, pady=10)
         ttk.Label(left, text="Preguntas:", font=(None, 11, 'bold')).pack(anchor='w')
-        self.lb = tk.Listbox(left, width=46, height=34)
+        # búsqueda: filtra la lista con el índice invertido (ver quiz_search)
+        self.search_index = None
+        self.search_pending = None
+        self.filtered = None
+        self.search_var = tk.StringVar()
+        self.search_info = tk.StringVar(value="")
+        search = ttk.Frame(left)
+        search.pack(fill=tk.X, pady=(2, 4))
+        ttk.Label(search, text="Buscar:").pack(side=tk.LEFT)
+        ttk.Entry(search, textvariable=self.search_var).pack(side=tk.LEFT, fill=tk.X, expand=True, padx=4)
+        ttk.Label(search, textvariable=self.search_info).pack(side=tk.LEFT)
+        self.search_var.trace_add('write', lambda *args: self.apply_filter())
+        self.lb = VirtualListbox(left, self.list_row, self.on_list_select, width=46, height=34)
         self.lb.pack(fill=tk.Y, expand=True)
-        self.lb.bind('<<ListboxSelect>>', self.on_list_select)
         self.refresh_listbox()
+        self.build_search_index()
 
         right = ttk.Frame(self)
         right.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True, padx=10, pady=10)
@@ -405,6 +315,9 @@ class QuizApp(tk.Tk):
         self.question_label.pack(anchor='w', pady=(0,10))
         self.options_container = ttk.Frame(right)
         self.options_container.pack(anchor='w')
+        # los radiobuttons se reutilizan entre preguntas: solo se cambian texto y valor
+        self.selected_var = tk.StringVar(value="")
+        self.option_buttons = []
 
         nav = ttk.Frame(right)
         nav.pack(fill=tk.X, pady=12)
@@ -414,16 +327,82 @@ class QuizApp(tk.Tk):
         if self.questions:
             self.show_question(0)
 
-    def refresh_listbox(self):
-        self.lb.delete(0, tk.END)
-        for i, q in enumerate(self.questions, start=1):
-            short = q['pregunta'][:72].replace('\\n',' ')
-            self.lb.insert(tk.END, f"{i}. {short}")
+    def list_row(self, row):
+        i = self.position_of(row)
+        short = self.questions[i]['pregunta'][:72].replace('\\n',' ')
+        return f"{i+1}. {short}"
 
-    def on_list_select(self, event):
-        sel = self.lb.curselection()
-        if sel:
-            self.show_question(sel[0])
+    def position_of(self, row):
+        """Posición en el banco de la fila visible row (la lista puede estar filtrada)."""
+        return row if self.filtered is None else self.filtered[row]
+
+    def row_of(self, idx):
+        """Fila de la lista que muestra la pregunta idx, o None si el filtro la oculta."""
+        if self.filtered is None:
+            return idx
+        row = bisect.bisect_left(self.filtered, idx)
+        return row if row < len(self.filtered) and self.filtered[row] == idx else None
+
+    def refresh_listbox(self):
+        self.lb.set_count(len(self.questions) if self.filtered is None else len(self.filtered))
+        self.lb.select(self.row_of(self.current_index))
+
+    def on_list_select(self, row):
+        self.show_question(self.position_of(row))
+
+    def build_search_index(self):
+        """
+        Construye el índice de búsqueda en un hilo de fondo a partir de una
+        copia del banco; los cambios hechos mientras tanto se encolan en
+        search_pending y se aplican al terminar. Si falla, se informa el error
+        y la búsqueda queda desactivada hasta la próxima recarga.
+        """
+        snapshot = list(self.questions)
+        self.search_index = None
+        self.search_pending = pending = []
+        built = []
+
+        def run():
+            try:
+                built.append(SearchIndex(snapshot))
+            except Exception as e:
+                built.append(e)
+
+        worker = threading.Thread(target=run, daemon=True)
+        worker.start()
+
+        def poll():
+            if self.search_pending is not pending:
+                return  # el banco se recargó y hay otra construcción en curso
+            if worker.is_alive():
+                self.after(EXPORT_POLL_MS, poll)
+                return
+            self.search_pending = None
+            index = built[0]
+            if isinstance(index, Exception):
+                self.apply_filter()
+                safe_show_error("Error al indexar la búsqueda", str(index))
+                return
+            for op, old, fields in pending:
+                index.apply(op, old, **fields)
+            self.search_index = index
+            self.apply_filter()
+
+        self.after(EXPORT_POLL_MS, poll)
+
+    def apply_filter(self):
+        query = self.search_var.get()
+        if not query.strip():
+            self.filtered = None
+            self.search_info.set("")
+        elif self.search_index is None:
+            self.filtered = None
+            self.search_info.set("indexando…" if self.search_pending is not None else "búsqueda no disponible")
+        else:
+            self.filtered = self.search_index.search(query)
+            shown = len(self.questions) if self.filtered is None else len(self.filtered)
+            self.search_info.set(f"{shown} de {len(self.questions)}")
+        self.refresh_listbox()
 
     def show_question(self, idx):
         if idx < 0 or idx >= len(self.questions):
@@ -431,28 +410,44 @@ class QuizApp(tk.Tk):
         self.current_index = idx
         q = self.questions[idx]
         self.question_label.config(text=f"{idx+1}. {q['pregunta']}")
-        for child in self.options_container.winfo_children():
-            child.destroy()
-        self.selected_var = tk.StringVar(value="")
-        for opt in q['opciones']:
-            rb = ttk.Radiobutton(self.options_container, text=opt, variable=self.selected_var, value=opt)
-            rb.pack(anchor='w', pady=2)
-        self.lb.selection_clear(0, tk.END)
-        self.lb.selection_set(idx)
-        self.lb.see(idx)
+        self.show_options(q['opciones'])
+        self.lb.select(self.row_of(idx))
+
+    def show_options(self, opciones):
+        self.selected_var.set("")
+        while len(self.option_buttons) < len(opciones):
+            self.option_buttons.append(ttk.Radiobutton(self.options_container, variable=self.selected_var))
+        for i, rb in enumerate(self.option_buttons):
+            if i < len(opciones):
+                rb.config(text=opciones[i], value=opciones[i])
+                if not rb.winfo_manager():
+                    rb.pack(anchor='w', pady=2)
+            elif rb.winfo_manager():
+                rb.pack_forget()
 
     def prev_question(self):
-        if self.current_index > 0:
+        if self.filtered is not None:
+            row = bisect.bisect_left(self.filtered, self.current_index) - 1
+            if row >= 0:
+                self.show_question(self.filtered[row])
+        elif self.current_index > 0:
             self.show_question(self.current_index - 1)
 
     def next_question(self):
-        if self.current_index < len(self.questions) - 1:
+        if self.filtered is not None:
+            row = bisect.bisect_right(self.filtered, self.current_index)
+            if row < len(self.filtered):
+                self.show_question(self.filtered[row])
+        elif self.current_index < len(self.questions) - 1:
             self.show_question(self.current_index + 1)
 
     def shuffle_questions(self):
         if not self.questions:
             return
-        random.shuffle(self.questions)
+        order = list(range(len(self.questions)))
+        random.shuffle(order)
+        self.questions[:] = [self.questions[i] for i in order]
+        self.record_change("reorder", order=order)
         self.refresh_listbox()
         self.show_question(0)
         safe_show_info("Hecho", "Orden de preguntas aleatorizado y GUI actualizada.")
@@ -460,24 +455,351 @@ class QuizApp(tk.Tk):
     def shuffle_options(self):
         if not self.questions:
             return
-        for q in self.questions:
-            random.shuffle(q['opciones'])
+        # se crean dicts nuevos en lugar de mutar los existentes (ver BankJournal)
+        perms = []
+        for i, q in enumerate(self.questions):
+            perm = list(range(len(q['opciones'])))
+            random.shuffle(perm)
+            perms.append(perm)
+            self.questions[i] = dict(q, opciones=[q['opciones'][j] for j in perm])
+        self.record_change("options", perms=perms)
         idx = min(self.current_index, len(self.questions)-1)
         self.refresh_listbox()
         self.show_question(idx)
         safe_show_info("Hecho", "Opciones barajadas para todas las preguntas y GUI actualizada.")
 
-    def reload_from_file(self):
-        self.questions = load_questions()
+    def open_journal(self):
+        try:
+            journal = BankJournal(QUESTIONS_FILE)
+        except OSError as e:
+            safe_show_warning("Aviso", f"Los cambios no se guardarán automáticamente:\n{e}")
+            return None
+        if journal.discarded:
+            count, backup = journal.discarded
+            safe_show_warning("Aviso", f"El diario de cambios no corresponde a la versión actual de questions.json "
+                                       f"(se modificó o restauró por fuera), así que sus {count} cambio(s) sin "
+                                       f"compactar no se aplicaron. Se guardó una copia en:\n{backup}")
+        return journal
+
+    def record_change(self, op, old=None, **fields):
+        """
+        Registra la operación en el diario del banco (compactándolo en segundo
+        plano cuando toca), la aplica al índice de búsqueda y la guarda en el
+        historial de deshacer. old es la pregunta anterior en edit y delete.
+        """
+        self.record_changes([(op, old, fields)])
+
+    def record_changes(self, changes, history=True):
+        """
+        Como record_change para una lista de (op, old, campos), con una sola
+        escritura y como un solo paso del historial (history=False para los
+        cambios que vienen del propio historial).
+        """
+        if history:
+            self.history.record(changes)
+        self.index_changes(changes)
+        if not self.bank_loaded:
+            self.claim_bank_file()
+            return
+        if self.journal is None:
+            return
+        try:
+            self.journal.record_many([dict(op=op, **fields) for op, _, fields in changes])
+        except OSError as e:
+            safe_show_error("Error al guardar", str(e))
+            return
+        if self.journal.should_compact():
+            self.journal.compact(self.questions)
+
+    def claim_bank_file(self):
+        """
+        Con questions.json sin cargar, los cambios quedan en memoria: el
+        archivo solo se reemplaza por el banco actual si el usuario lo
+        confirma (se pregunta una vez; "Recargar desde JSON" vuelve a leerlo).
+        """
+        if not self.overwrite_declined:
+            self.overwrite_declined = not messagebox.askyesno(
+                "Sobrescribir questions.json",
+                "questions.json no se pudo cargar, así que los cambios no se están guardando.\n"
+                f"¿Reemplazar su contenido por el banco actual ({len(self.questions)} preguntas)?")
+            if not self.overwrite_declined and save_questions_to_file(self.questions, QUESTIONS_FILE):
+                self.bank_loaded = True
+                self.journal = self.open_journal()
+                return
+        self.status_var.set("questions.json no se cargó: los cambios solo están en memoria.")
+
+    def undo(self):
+        self.step_history(self.history.undo, undone=True)
+
+    def redo(self):
+        self.step_history(self.history.redo, undone=False)
+
+    def step_history(self, step_back, undone):
+        """Deshace o rehace un paso (step_back es History.undo o .redo) y muestra la pregunta afectada."""
+        result = step_back(self.questions)
+        if result is None:
+            self.status_var.set("No hay nada que deshacer." if undone else "No hay nada que rehacer.")
+            return
+        step, applied = result
+        self.record_changes(applied, history=False)
+        idx = self.current_index
+        for op, _, fields in reversed(step):
+            if op == "edit" or (op == "delete" and undone):
+                idx = fields["i"]
+                break
+            if op == "add" and not undone:
+                idx = len(self.questions) - 1
+                break
         self.refresh_listbox()
         if self.questions:
-            self.show_question(0)
-        safe_show_info("Recargado", "Preguntas recargadas desde questions.json")
+            self.show_question(min(idx, len(self.questions) - 1))
+        else:
+            self.current_index = 0
+            self.question_label.config(text="")
+            self.show_options([])
+        self.status_var.set(f"{'Deshecho' if undone else 'Rehecho'}: {describe(step)}")
+
+    def index_changes(self, changes):
+        """Aplica los cambios al índice de búsqueda (o los encola si se está construyendo) y al filtro."""
+        for op, old, fields in changes:
+            if self.search_index is not None:
+                self.search_index.apply(op, old, **fields)
+            elif self.search_pending is not None:
+                self.search_pending.append((op, old, fields))
+        if self.search_index is not None and self.search_var.get().strip():
+            self.apply_filter()
+
+    def run_in_background(self, work, done, status, error_title="Error", failed=None):
+        """
+        Ejecuta work() en un hilo y, al terminar, done(resultado) en el hilo
+        de la interfaz (o muestra el error con error_title, o llama a
+        failed(error) si se indica). Mientras tanto la barra de estado
+        muestra status(), que se vuelve a consultar en cada sondeo.
+        """
+        outcome = []
+
+        def run():
+            try:
+                outcome.append(work())
+            except Exception as e:
+                outcome.append(e)
+
+        worker = threading.Thread(target=run, daemon=True)
+        worker.start()
+
+        def poll():
+            if worker.is_alive():
+                self.status_var.set(status())
+                self.after(EXPORT_POLL_MS, poll)
+                return
+            self.status_var.set("")
+            result = outcome[0]
+            if isinstance(result, Exception):
+                if failed is not None:
+                    failed(result)
+                else:
+                    safe_show_error(error_title, str(result))
+            else:
+                done(result)
+
+        poll()
+
+    def find_duplicates_ui(self):
+        if not self.questions:
+            return
+        # el import se retrasa para no cargar quiz_dedup (ni NumPy) al arrancar
+        from quiz_dedup import find_duplicates
+        snapshot = list(self.questions)
+
+        def done(groups):
+            if not self.same_bank(snapshot):
+                self.status_var.set("El banco cambió durante la búsqueda de duplicados: vuelve a buscar.")
+            elif not groups:
+                safe_show_info("Duplicados", "No se encontraron preguntas duplicadas.")
+            else:
+                DuplicateReport(self, groups, snapshot)
+
+        self.run_in_background(lambda: find_duplicates(snapshot), done,
+                               lambda: f"Buscando duplicados entre {len(snapshot)} preguntas...",
+                               "Error al buscar duplicados")
+
+    def import_banks_ui(self):
+        paths = filedialog.askopenfilenames(
+            title="Importar preguntas",
+            filetypes=[("Bancos de preguntas", " ".join("*" + ext for ext in FORMATS)), ("Todos", "*.*")])
+        if not paths:
+            return
+        snapshot = list(self.questions)
+        read = [0, 1]
+
+        def progress(done, total):
+            read[:] = done, total
+
+        def done(result):
+            imported, skipped = result
+            if not imported:
+                safe_show_info("Importar", f"No hay preguntas nuevas ({skipped} ya estaban en el banco).")
+                return
+            start = len(self.questions)
+            self.questions.extend(imported)
+            self.record_changes([("add", None, {"q": q}) for q in imported])
+            self.refresh_listbox()
+            self.show_question(start)
+            safe_show_info("Importar", f"Se importaron {len(imported)} preguntas"
+                                       f" ({skipped} repetidas se omitieron).")
+
+        self.run_in_background(lambda: merge_banks(list(paths), progress=progress, existing=snapshot), done,
+                               lambda: f"Importando {len(paths)} archivo(s)... {read[0] * 100 // max(read[1], 1)}%",
+                               "Error al importar")
+
+    def same_bank(self, snapshot):
+        return len(snapshot) == len(self.questions) and all(a is b for a, b in zip(snapshot, self.questions))
+
+    def merge_duplicates(self, groups, include_similar):
+        """Conserva la primera pregunta de cada grupo y borra las demás (como operaciones del diario)."""
+        from quiz_dedup import merge_duplicates
+        merged, dropped = merge_duplicates(self.questions, groups, include_similar)
+        if not dropped:
+            return 0
+        removed = set(dropped)
+        kept = (i for i in range(len(self.questions)) if i not in removed)
+        changes = []
+        for i, q in zip(kept, merged):
+            if q is not self.questions[i]:
+                changes.append(("edit", self.questions[i], {"i": i, "q": q}))
+                self.questions[i] = q
+        for i in reversed(dropped):
+            changes.append(("delete", self.questions[i], {"i": i}))
+            del self.questions[i]
+        self.record_changes(changes)
+        self.refresh_listbox()
+        if self.questions:
+            self.show_question(min(self.current_index, len(self.questions) - 1))
+        return len(dropped)
+
+    def reload_from_file(self):
+        ensure_questions()
+        self.sync_from_file(notify=True)
+
+    def toggle_watch(self):
+        if self.watch_var.get():
+            self.watcher = BankWatcher(QUESTIONS_FILE)
+            self.after(WATCH_POLL_MS, self.poll_watch, self.watcher)
+        else:
+            self.watcher = None
+
+    def poll_watch(self, watcher):
+        if watcher is not self.watcher:
+            return  # la vigilancia se desactivó (o se volvió a activar con otro sondeo)
+        if not self.syncing and not self.compacting() and watcher.changed():
+            if self.journal is not None and read_journal(QUESTIONS_FILE) is not None:
+                # el diario sigue siendo válido: el archivo lo reescribió su propia compactación
+                watcher.acknowledge(file_stamp(QUESTIONS_FILE))
+            else:
+                self.sync_from_file()
+        self.after(WATCH_POLL_MS, self.poll_watch, watcher)
+
+    def compacting(self):
+        """True mientras el hilo de compactación del diario está reescribiendo questions.json."""
+        return self.journal is not None and self.journal.worker is not None and self.journal.worker.is_alive()
+
+    def on_close(self):
+        """
+        Al cerrar se compacta el diario: questions.json queda con todos los
+        cambios, listo para copiarlo o compartirlo sin su diario.
+        """
+        if self.journal is not None:
+            if self.compacting():
+                self.journal.worker.join()
+            if self.journal.pending:
+                self.status_var.set("Guardando el banco...")
+                self.update_idletasks()
+                self.journal.compact(self.questions, background=False)
+        self.destroy()
+
+    def sync_from_file(self, notify=False):
+        """
+        Relee questions.json en segundo plano y aplica a la lista, al índice
+        de búsqueda y al diario solo las preguntas añadidas, modificadas o
+        eliminadas (ver quiz_watch), conservando la pregunta seleccionada.
+        Si el archivo cambió por fuera, los cambios locales todavía no
+        compactados no se aplican (el archivo manda): su diario se aparta en
+        una copia y se avisa. Con notify se informa con un diálogo; si no,
+        en la barra de estado.
+        """
+        if self.compacting():
+            # la compactación reescribe el archivo y luego su diario (con su propio
+            # candado): releer o abrir otro diario antes de que termine mezclaría ambos
+            self.status_var.set("Esperando a que termine de guardarse el banco...")
+            self.after(EXPORT_POLL_MS, self.sync_from_file, notify)
+            return
+        snapshot = list(self.questions)
+        stamp = file_stamp(QUESTIONS_FILE)
+        self.syncing = True
+
+        def done(diff):
+            self.syncing = False
+            if not self.same_bank(snapshot):
+                # se editó mientras se leía: la vigilancia lo reintenta en el próximo sondeo
+                if notify:
+                    self.status_var.set("El banco cambió durante la recarga: vuelve a recargar.")
+                return
+            # una compactación solo puede empezar tras un cambio del banco, que
+            # same_bank ya descartó: aquí el diario anterior está quieto (si ya
+            # no corresponde al archivo, open_journal lo aparta y lo avisa)
+            self.bank_loaded = True
+            self.overwrite_declined = False
+            self.journal = self.open_journal()
+            if self.watcher is not None:
+                self.watcher.acknowledge(stamp)
+            if diff:
+                # los pasos del historial usan posiciones del banco anterior
+                self.history.clear()
+                self.apply_diff(diff)
+            message = f"questions.json recargado: {diff.summary()}"
+            if notify:
+                safe_show_info("Recargado", message)
+            else:
+                self.status_var.set(message)
+
+        def failed(error):
+            self.syncing = False
+            if notify:
+                safe_show_error("Error al cargar preguntas", str(error))
+                return
+            # no se reintenta hasta que el archivo vuelva a cambiar (p. ej. se termine de guardar)
+            if self.watcher is not None:
+                self.watcher.acknowledge(stamp)
+            self.status_var.set(f"No se pudo recargar questions.json: {error}")
+
+        self.run_in_background(lambda: diff_banks(snapshot, read_questions(QUESTIONS_FILE)), done,
+                               lambda: "Recargando questions.json...", failed=failed)
+
+    def apply_diff(self, diff):
+        """Aplica un quiz_watch.BankDiff al banco en memoria y a la vista, siguiendo a la pregunta mostrada."""
+        shown = self.questions[self.current_index] if self.current_index < len(self.questions) else None
+        idx = diff.position(self.current_index)
+        apply_ops(self.questions, [dict(op=op, **fields) for op, _, fields in diff.changes])
+        self.index_changes(diff.changes)
+        if not self.questions:
+            self.current_index = 0
+            self.refresh_listbox()
+            self.question_label.config(text="")
+            self.show_options([])
+        elif idx is None or self.questions[idx] is not shown:
+            # se eliminó o se modificó: se muestra la que quedó en su lugar (o la misma, actualizada)
+            self.current_index = min(self.current_index if idx is None else idx, len(self.questions) - 1)
+            self.refresh_listbox()
+            self.show_question(self.current_index)
+        else:
+            # sin cambios de contenido solo se actualiza el número (no se borra la opción marcada)
+            self.current_index = idx
+            self.refresh_listbox()
+            self.question_label.config(text=f"{idx+1}. {shown['pregunta']}")
 
     def save_current_order(self):
         try:
-            with open(SAVED_ORDER_FILE, "w", encoding="utf-8") as f:
-                json.dump(self.questions, f, ensure_ascii=False, indent=2)
+            write_questions(self.questions, SAVED_ORDER_FILE)
             safe_show_info("Guardado", f"Orden actual guardado en: {SAVED_ORDER_FILE}")
         except Exception as e:
             safe_show_error("Error al guardar", str(e))
@@ -487,6 +809,7 @@ class QuizApp(tk.Tk):
         self.wait_window(dlg)
         if getattr(dlg, "result", None):
             self.questions.append(dlg.result)
+            self.record_change("add", q=dlg.result)
             self.refresh_listbox()
             self.show_question(len(self.questions)-1)
             safe_show_info("Añadido", "Pregunta añadida correctamente.")
@@ -498,8 +821,10 @@ class QuizApp(tk.Tk):
         dlg = QuestionEditor(self, title="Editar pregunta", data=self.questions[idx])
         self.wait_window(dlg)
         if getattr(dlg, "result", None):
+            old = self.questions[idx]
             self.questions[idx] = dlg.result
-            self.refresh_listbox()
+            self.record_change("edit", old, i=idx, q=dlg.result)
+            self.lb.refresh_rows([idx])
             self.show_question(idx)
             safe_show_info("Editado", "Pregunta editada correctamente.")
 
@@ -510,23 +835,78 @@ class QuizApp(tk.Tk):
         q = self.questions[idx]
         if messagebox.askyesno("Confirmar eliminación", f"¿Eliminar la pregunta {idx+1}?\n{q['pregunta']}"):
             del self.questions[idx]
+            self.record_change("delete", q, i=idx)
             self.refresh_listbox()
             if self.questions:
                 new_idx = min(idx, len(self.questions)-1)
                 self.show_question(new_idx)
             else:
                 self.question_label.config(text="")
-                for child in self.options_container.winfo_children():
-                    child.destroy()
+                self.show_options([])
             safe_show_info("Eliminado", "Pregunta eliminada.")
 
+    def start_export(self, description, work, done_message, target=None, versions_total=0, output=None):
+        """
+        Ejecuta work(progress) en un hilo de fondo. La ventana sigue
+        respondiendo; el avance se muestra en la barra de estado (consultada
+        con after()) y la exportación se puede cancelar. target es el archivo
+        que se borra si se cancela o falla a medias; output (por defecto
+        target) es dónde se deja el perfil si QUIZ_PROFILE está activo.
+        """
+        if self.export_job is not None:
+            self.status_var.set("Ya hay una exportación en curso: espera a que termine o cancélala.")
+            return
+        self.export_job = ExportJob(description, work, done_message, target, versions_total, output)
+        self.progress_bar.config(value=0)
+        self.cancel_button.config(state=tk.NORMAL)
+        self.export_job.start()
+        self.after(EXPORT_POLL_MS, self.poll_export)
+
+    def poll_export(self):
+        job = self.export_job
+        if job is None:
+            return
+        progress = job.progress
+        if job.is_alive():
+            if progress.cancelled:
+                self.status_var.set(f"{job.description}: cancelando...")
+            elif progress.versions_total:
+                self.progress_bar.config(value=100 * progress.versions_done / progress.versions_total)
+                self.status_var.set(f"{job.description}: {progress.versions_done}/{progress.versions_total} "
+                                    f"versiones, {progress.pages} páginas")
+            else:
+                self.status_var.set(f"{job.description}: {progress.pages} páginas")
+            self.after(EXPORT_POLL_MS, self.poll_export)
+            return
+
+        self.export_job = None
+        self.cancel_button.config(state=tk.DISABLED)
+        if job.error is not None:
+            self.progress_bar.config(value=0)
+            self.status_var.set(f"{job.description}: error")
+            safe_show_error("Error al exportar PDF", str(job.error))
+        elif job.cancelled:
+            self.progress_bar.config(value=0)
+            self.status_var.set(f"{job.description}: cancelada ({progress.pages} páginas escritas)")
+        else:
+            self.progress_bar.config(value=100)
+            self.status_var.set(job.done_message)
+
+    def cancel_export(self):
+        if self.export_job is not None:
+            self.export_job.progress.cancel()
+
     def export_current_pdf(self):
         path = filedialog.asksaveasfilename(defaultextension=".pdf", filetypes=[("PDF files","*.pdf")], initialfile="quiz_export.pdf")
         if not path:
             return
-        ok = export_single_pdf(self.questions, path, title=pdf_title)
-        if ok:
-            safe_show_info("Exportado", f"PDF exportado en:\n{path}")
+        questions = list(self.questions)
+        title = pdf_title
+
+        def work(progress):
+            render_single_pdf(questions, path, title, progress=progress)
+
+        self.start_export("Exportando PDF", work, f"PDF exportado en: {path}", target=path)
 
     def generate_versions_ui(self):
         n = simpledialog.askinteger("Generar versiones", "¿Cuántas versiones quieres generar?", minvalue=1, maxvalue=200)
@@ -535,16 +915,233 @@ class QuizApp(tk.Tk):
         path = filedialog.asksaveasfilename(defaultextension=".pdf", filetypes=[("PDF files","*.pdf")], initialfile="versions_quiz.pdf")
         if not path:
             return
-        versions = []
-        for i in range(1, n+1):
-            qcopy = copy.deepcopy(self.questions)
-            random.shuffle(qcopy)
-            for q in qcopy:
-                random.shuffle(q['opciones'])
-            versions.append((i, qcopy))
-        ok = build_versions_pdf(versions, path, title=pdf_title)
-        if ok:
-            safe_show_info("Generado", f"PDF con {n} versiones generado en:\n{path}")
+        size = self.ask_sample_size("Generar versiones")
+        if not size:
+            return
+        seed = new_master_seed()
+        questions = list(self.questions)
+        title = pdf_title
+        generate = generate_balanced_versions if self.balanced_var.get() else generate_versions
+
+        def work(progress):
+            with stage("generar versiones"):
+                sampler = StratifiedSampler(questions, size) if size < len(questions) else None
+                versions = generate(questions, n, seed, sampler=sampler)
+            render_versions_pdf(versions, path, title, workers=PDF_WORKERS, progress=progress)
+
+        self.start_export("Generando versiones", work,
+                          f"PDF con {n} versiones generado en: {path} — semilla maestra {seed} (anótela junto con la huella del banco de la hoja de claves)",
+                          target=path, versions_total=n)
+
+    def generate_versions_dir_ui(self):
+        n = simpledialog.askinteger("Generar versiones", "¿Cuántas versiones quieres generar?", minvalue=1, maxvalue=200)
+        if not n:
+            return
+        outdir = filedialog.askdirectory(title="Carpeta para las versiones")
+        if not outdir:
+            return
+        size = self.ask_sample_size("Generar versiones")
+        if not size:
+            return
+        seed = new_master_seed()
+        questions = list(self.questions)
+        title = pdf_title
+        generate = generate_balanced_versions if self.balanced_var.get() else generate_versions
+
+        def work(progress):
+            with stage("generar versiones"):
+                sampler = StratifiedSampler(questions, size) if size < len(questions) else None
+                versions = generate(questions, n, seed, sampler=sampler)
+            render_versions_dir(versions, outdir, title, progress=progress)
+
+        self.start_export("Generando versiones", work,
+                          f"{n} versiones y keys.pdf generados en: {outdir} — semilla maestra {seed} (anótela junto con la huella del banco de la hoja de claves)",
+                          versions_total=n, output=outdir)
+
+    def ask_fingerprint(self, title):
+        """
+        Huella del banco de la tanda ("" si el usuario decide seguir sin
+        ella), o None si se cancela.
+        """
+        expected = simpledialog.askstring(title, "Huella del banco (aparece junto a la semilla en la hoja de claves):")
+        if expected is None:
+            return None
+        if not expected.strip() and not messagebox.askyesno(
+                title, "Sin la huella no se puede comprobar que el banco (y su orden) sea el de la tanda; si "
+                       "cambió, las versiones y claves no coincidirán con las originales.\n¿Continuar de todos modos?"):
+            return None
+        return expected
+
+    def ask_sample_size(self, title):
+        """Preguntas por versión (todas por defecto); None si se cancela."""
+        if not self.questions:
+            return None
+        return simpledialog.askinteger(
+            title, "¿Cuántas preguntas por versión?\n(si son menos que el banco se muestrean por tema y dificultad)",
+            initialvalue=len(self.questions), minvalue=1, maxvalue=len(self.questions))
+
+    def regenerate_version_ui(self):
+        seed = simpledialog.askinteger("Regenerar versión", "Semilla maestra (aparece en la hoja de claves):", minvalue=0)
+        if seed is None:
+            return
+        k = simpledialog.askinteger("Regenerar versión", "¿Qué número de versión quieres regenerar?", minvalue=1)
+        if not k:
+            return
+        expected = self.ask_fingerprint("Regenerar versión")
+        if expected is None:
+            return
+        size = self.ask_sample_size("Regenerar versión")
+        if not size:
+            return
+        path = filedialog.asksaveasfilename(defaultextension=".pdf", filetypes=[("PDF files","*.pdf")], initialfile=f"version_{k:03d}.pdf")
+        if not path:
+            return
+        questions = list(self.questions)
+        title = pdf_title
+        # debe coincidir con el modo de la tanda original (la hoja de claves indica si era balanceada)
+        generate = generate_balanced_version if self.balanced_var.get() else generate_version
+
+        def work(progress):
+            # solo coincide con la original si el banco (y su orden) no ha cambiado desde entonces
+            with stage("generar versiones"):
+                bank = check_fingerprint(questions, expected) if expected.strip() else freeze_bank(questions)
+                sampler = StratifiedSampler(bank, size) if size < len(bank) else None
+                version = generate(bank, k, seed, sampler=sampler)
+            render_versions_pdf([version], path, title, progress=progress)
+
+        self.start_export("Regenerando versión", work,
+                          f"Versión {k} (semilla {seed}) y su clave regeneradas en: {path}",
+                          target=path, versions_total=1)
+
+    def grade_ui(self):
+        path = filedialog.askopenfilename(title="Hojas de respuestas", filetypes=[("CSV", "*.csv")])
+        if not path:
+            return
+        seed = simpledialog.askinteger("Calificar", "Semilla maestra de la tanda (aparece en la hoja de claves):",
+                                       minvalue=0)
+        if seed is None:
+            return
+        expected = self.ask_fingerprint("Calificar")
+        if expected is None:
+            return
+        size = self.ask_sample_size("Calificar")
+        if not size:
+            return
+        out = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV", "*.csv")],
+                                           initialfile="notas.csv")
+        if not out:
+            return
+        items_path = os.path.splitext(out)[0] + "_preguntas.csv"
+        questions = list(self.questions)
+        # como al regenerar: el modo balanceado y el banco deben ser los de la tanda original
+        balanced = self.balanced_var.get()
+
+        def work():
+            # el import se retrasa (y se hace en el hilo de fondo) para no cargar NumPy al arrancar
+            from quiz_grading import AnswerKeys, grade, read_responses
+
+            bank = check_fingerprint(questions, expected) if expected.strip() else freeze_bank(questions)
+            students, numbers, letters = read_responses(path)
+            if not students:
+                raise ValueError(f"{path} no contiene hojas de respuestas")
+            sampler = StratifiedSampler(bank, size) if size < len(bank) else None
+            versions = regenerate_versions(bank, sorted(set(numbers.tolist())), seed, balanced, sampler)
+            report = grade(AnswerKeys(versions), students, numbers, letters)
+            report.write_scores(out)
+            report.write_items(items_path)
+            return report.summary()
+
+        def done(summary):
+            safe_show_info("Calificación", f"{summary}\n\nNotas: {out}\nEstadísticas por pregunta: {items_path}")
+
+        self.run_in_background(work, done, lambda: "Calificando hojas de respuestas...", "Error al calificar")
+
+
+class ExportJob:
+    """
+    Una exportación ejecutándose en un hilo de fondo. El hilo nunca toca
+    Tk: solo actualiza progress, y la interfaz lo consulta con after().
+    """
+
+    def __init__(self, description, work, done_message, target=None, versions_total=0, output=None):
+        self.description = description
+        self.work = work
+        self.done_message = done_message
+        self.target = target
+        self.output = output or target
+        self.progress = ExportProgress(versions_total)
+        self.error = None
+        self.cancelled = False
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def is_alive(self):
+        return self.thread.is_alive()
+
+    def _run(self):
+        try:
+            with profiled(self.output):
+                self.work(self.progress)
+        except ExportCancelled:
+            self.cancelled = True
+            self._remove_target()
+        except Exception as e:
+            self.error = e
+            self._remove_target()
+
+    def _remove_target(self):
+        if self.target and os.path.exists(self.target):
+            try:
+                os.remove(self.target)
+            except OSError:
+                pass
+
+
+class DuplicateReport(tk.Toplevel):
+    """
+    Informe de duplicados con la opción de fusionarlos en el banco abierto.
+    La ventana no es modal: snapshot es el banco sobre el que se buscaron
+    los grupos y solo se fusiona si el banco sigue siendo ese.
+    """
+
+    def __init__(self, parent, groups, snapshot):
+        super().__init__(parent)
+        self.title("Preguntas duplicadas")
+        self.transient(parent)
+        self.parent = parent
+        self.groups = groups
+        self.snapshot = snapshot
+
+        from quiz_dedup import format_report
+        text = tk.Text(self, width=110, height=32, wrap='none')
+        text.insert('1.0', format_report(groups, snapshot, limit=500))
+        text.config(state=tk.DISABLED)
+        text.pack(fill=tk.BOTH, expand=True, padx=6, pady=6)
+
+        btn_frame = ttk.Frame(self)
+        btn_frame.pack(fill=tk.X, pady=6)
+        ttk.Button(btn_frame, text="Cerrar", command=self.destroy).pack(side=tk.RIGHT, padx=6)
+        ttk.Button(btn_frame, text="Eliminar exactos y similares",
+                   command=lambda: self.merge(True)).pack(side=tk.RIGHT, padx=6)
+        ttk.Button(btn_frame, text="Eliminar duplicados exactos",
+                   command=lambda: self.merge(False)).pack(side=tk.RIGHT, padx=6)
+
+    def merge(self, include_similar):
+        if not messagebox.askyesno(
+                "Confirmar", "Se conservará la primera pregunta de cada grupo y se borrarán las demás "
+                             "(los grupos con respuestas distintas no se tocan). ¿Continuar?", parent=self):
+            return
+        # se comprueba después del diálogo: mientras estaba abierto pudo aplicarse una recarga
+        if not self.parent.same_bank(self.snapshot):
+            # las posiciones de los grupos ya no corresponden al banco
+            safe_show_warning("Duplicados", "El banco cambió desde la búsqueda: vuelve a buscar duplicados.")
+            self.destroy()
+            return
+        removed = self.parent.merge_duplicates(self.groups, include_similar)
+        self.destroy()
+        safe_show_info("Duplicados", f"Se eliminaron {removed} preguntas duplicadas.")
 
 
 class QuestionEditor(tk.Toplevel):
@@ -570,8 +1167,15 @@ class QuestionEditor(tk.Toplevel):
         self.correct_var = tk.StringVar()
         ttk.Entry(self, textvariable=self.correct_var, width=70).grid(row=8, column=0, columnspan=4, padx=6, pady=6)
 
+        ttk.Label(self, text="Tema (opcional):").grid(row=9, column=0, sticky='w', padx=6)
+        self.tema_var = tk.StringVar()
+        ttk.Entry(self, textvariable=self.tema_var, width=30).grid(row=9, column=1, sticky='w', padx=6, pady=2)
+        ttk.Label(self, text="Dificultad (opcional):").grid(row=9, column=2, sticky='w', padx=6)
+        self.dificultad_var = tk.StringVar()
+        ttk.Entry(self, textvariable=self.dificultad_var, width=12).grid(row=9, column=3, sticky='w', padx=6, pady=2)
+
         btn_frame = ttk.Frame(self)
-        btn_frame.grid(row=9, column=0, columnspan=4, pady=8)
+        btn_frame.grid(row=10, column=0, columnspan=4, pady=8)
         ttk.Button(btn_frame, text="Cancelar", command=self.cancel).pack(side=tk.RIGHT, padx=6)
         ttk.Button(btn_frame, text="Guardar", command=self.on_save).pack(side=tk.RIGHT, padx=6)
 
@@ -581,6 +1185,8 @@ class QuestionEditor(tk.Toplevel):
                 if i < len(self.option_vars):
                     self.option_vars[i].set(opt)
             self.correct_var.set(data.get('respuesta',''))
+            self.tema_var.set(data.get('tema', ''))
+            self.dificultad_var.set(data.get('dificultad', ''))
 
         self.bind('<Return>', lambda e: self.on_save())
         self.bind('<Escape>', lambda e: self.cancel())
@@ -605,6 +1211,12 @@ class QuestionEditor(tk.Toplevel):
             safe_show_error("Error", "La respuesta correcta debe ser exactamente igual a una de las opciones.")
             return
         self.result = {'pregunta': pregunta, 'opciones': opciones, 'respuesta': respuesta}
+        tema = self.tema_var.get().strip()
+        dificultad = self.dificultad_var.get().strip()
+        if tema:
+            self.result['tema'] = tema
+        if dificultad:
+            self.result['dificultad'] = int(dificultad) if dificultad.isdigit() else dificultad
         self.destroy()
 
     def cancel(self):
@@ -613,5 +1225,7 @@ class QuestionEditor(tk.Toplevel):
 
 
 if __name__ == '__main__':
+    import multiprocessing
+    multiprocessing.freeze_support()
     app = QuizApp()
     app.mainloop()
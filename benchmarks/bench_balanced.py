@@ -0,0 +1,49 @@
+"""
+Generación de versiones balanceadas frente a la generación independiente:
+tiempo, balance de letras de la respuesta y distancias mínimas entre pares.
+
+    python benchmarks/bench_balanced.py --versions 500 --questions 200
+"""
+import argparse
+import itertools
+import os
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from quiz_versions import generate_balanced_versions, generate_versions, hamming  # noqa: E402
+from benchmarks.synthetic import synthetic_bank  # noqa: E402
+
+
+def describe(name, versions, elapsed, pairs):
+    letters = Counter(k for v in versions for k in v.keys)
+    spread = max(letters.values()) - min(letters.values())
+    per_version = max(max(c.values()) - min(c.values())
+                      for c in (Counter(v.keys) for v in versions))
+    sample = list(itertools.combinations(versions[:pairs], 2))
+    order_min = min((hamming(a.order, b.order) for a, b in sample), default=0)
+    key_min = min((hamming(a.keys, b.keys) for a, b in sample), default=0)
+    print(f"{name:<13} {elapsed * 1000:9.1f} ms  desbalance total {spread:5d}  "
+          f"por versión {per_version:3d}  dist. mín. orden {order_min:4d}  clave {key_min:4d}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--versions", type=int, default=500)
+    parser.add_argument("--questions", type=int, default=200)
+    parser.add_argument("--pairs", type=int, default=150,
+                        help="versiones entre las que se miden las distancias (todos los pares)")
+    args = parser.parse_args()
+
+    bank = synthetic_bank(args.questions)
+    print(f"{args.versions} versiones de {args.questions} preguntas")
+    for name, generate in (("independiente", generate_versions), ("balanceada", generate_balanced_versions)):
+        start = time.perf_counter()
+        versions = generate(bank, args.versions, 42)
+        describe(name, versions, time.perf_counter() - start, args.pairs)
+
+
+if __name__ == "__main__":
+    main()
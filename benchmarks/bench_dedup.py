@@ -0,0 +1,69 @@
+"""
+Tiempo y exhaustividad de la búsqueda de duplicados (quiz_dedup) sobre un
+banco sintético con copias exactas y casi exactas plantadas.
+
+    python benchmarks/bench_dedup.py --size 100000 --planted 200
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import quiz_dedup  # noqa: E402
+from benchmarks.synthetic import synthetic_bank  # noqa: E402
+
+
+def plant(questions, count, seed=0):
+    """
+    Añade count copias exactas (cambiando mayúsculas y el orden de las
+    opciones) y count casi exactas (una palabra de la pregunta cambiada).
+    Devuelve los pares (original, copia) de cada tipo.
+    """
+    rng = random.Random(seed)
+    exact, similar = [], []
+    for kind, pairs in (("exacto", exact), ("similar", similar)):
+        for source in rng.sample(range(len(questions)), count):
+            q = questions[source]
+            options = q["opciones"][:]
+            rng.shuffle(options)
+            text = q["pregunta"].upper()
+            if kind == "similar":
+                words = q["pregunta"].split()
+                words[rng.randrange(1, len(words))] = "modificada"
+                text = " ".join(words)
+            pairs.append((source, len(questions)))
+            questions.append(dict(q, pregunta=text, opciones=options))
+    return exact, similar
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, default=100000)
+    parser.add_argument("--planted", type=int, default=200)
+    parser.add_argument("--threshold", type=float, default=0.7)
+    parser.add_argument("--no-numpy", action="store_true", help="fuerza el cálculo en Python puro")
+    args = parser.parse_args()
+    if args.no_numpy:
+        quiz_dedup.load_numpy = lambda: None
+
+    questions = synthetic_bank(args.size)
+    exact, similar = plant(questions, args.planted)
+    start = time.perf_counter()
+    groups = quiz_dedup.find_duplicates(questions, threshold=args.threshold)
+    elapsed = time.perf_counter() - start
+
+    group_of = {i: g.indices[0] for g in groups for i in g.indices}
+    for name, pairs in (("exactas", exact), ("similares", similar)):
+        found = sum(1 for a, b in pairs if a in group_of and group_of.get(a) == group_of.get(b))
+        print(f"  copias {name:<10} {found}/{len(pairs)} encontradas")
+    kinds = [g.kind for g in groups]
+    print(f"{len(questions)} preguntas en {elapsed:.2f} s "
+          f"({'NumPy' if quiz_dedup.np is not None else 'Python puro'}): "
+          f"{kinds.count('exacto')} grupos exactos, {kinds.count('similar')} similares")
+
+
+if __name__ == "__main__":
+    main()
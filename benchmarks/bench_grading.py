@@ -0,0 +1,69 @@
+"""
+Tiempo de calificación (quiz_grading) de un CSV sintético de hojas de
+respuestas: lectura del CSV, armado de las claves y calificación.
+
+    python benchmarks/bench_grading.py --sheets 50000 --versions 300 --questions 100
+"""
+import argparse
+import csv
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from quiz_grading import AnswerKeys, grade, read_responses  # noqa: E402
+from quiz_versions import generate_versions  # noqa: E402
+from benchmarks.synthetic import synthetic_bank  # noqa: E402
+
+
+def write_sheets(path, versions, sheets, accuracy, seed=0):
+    """Hojas al azar: cada respuesta es la correcta con probabilidad accuracy."""
+    rng = random.Random(seed)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["estudiante", "version", "respuestas"])
+        for s in range(sheets):
+            v = rng.choice(versions)
+            letters = "".join(key if rng.random() < accuracy else rng.choice("ABCD-")
+                              for key in v.answer_key())
+            writer.writerow([f"estudiante_{s:06d}", v.number, letters])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sheets", type=int, default=50000)
+    parser.add_argument("--versions", type=int, default=300)
+    parser.add_argument("--questions", type=int, default=100)
+    args = parser.parse_args()
+
+    versions = generate_versions(synthetic_bank(args.questions), args.versions, seed=1)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "hojas.csv")
+        write_sheets(path, versions, args.sheets, accuracy=0.7)
+
+        start = time.perf_counter()
+        students, numbers, letters = read_responses(path)
+        read = time.perf_counter() - start
+        start = time.perf_counter()
+        keys = AnswerKeys(versions)
+        built = time.perf_counter() - start
+        start = time.perf_counter()
+        report = grade(keys, students, numbers, letters)
+        graded = time.perf_counter() - start
+        start = time.perf_counter()
+        report.write_scores(os.path.join(tmp, "notas.csv"))
+        report.write_items(os.path.join(tmp, "preguntas.csv"))
+        written = time.perf_counter() - start
+
+    print(f"{args.sheets} hojas, {args.versions} versiones de {args.questions} preguntas")
+    for label, elapsed in (("leer CSV", read), ("armar claves", built), ("calificar", graded),
+                           ("escribir resultados", written)):
+        print(f"  {label:<20} {elapsed * 1000:8.1f} ms")
+    print(f"  {report.summary()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Compara el encabezado dibujado en cada página (comportamiento anterior) con
+el encabezado cacheado como form XObject: tiempo de render y tamaño del PDF.
+
+    python benchmarks/bench_header.py --pages 2000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import quiz_pdf  # noqa: E402
+
+
+def legacy_header_footer(cnv, doc):
+    # copia del header_footer original: drawImage por ruta y textos en cada página
+    from reportlab.lib.pagesizes import letter
+
+    cnv.saveState()
+    width, height = letter
+    try:
+        cnv.drawImage(quiz_pdf.LOGO_FILE, 40, height - 90, width=70, height=70, preserveAspectRatio=True, mask='auto')
+    except Exception:
+        cnv.setFont('Helvetica-Oblique', 8)
+        cnv.drawString(40, height - 40, "[Logo no encontrado]")
+    cnv.setFont("Helvetica-Bold", 9)
+    text_y = height - 45
+    for line in quiz_pdf.HEADER_TEXT.split("\n"):
+        cnv.drawCentredString(width / 2 + 40, text_y, line.strip())
+        text_y -= 12
+    cnv.setLineWidth(0.8)
+    cnv.line(40, height - 100, width - 40, height - 100)
+    quiz_pdf.draw_page_number(cnv, doc.page)
+    cnv.restoreState()
+
+
+def render(path, pages, on_page):
+    from reportlab.platypus import PageBreak, Paragraph
+
+    styles = quiz_pdf.pdf_styles()
+    flow = []
+    for i in range(pages):
+        flow.append(Paragraph(f"Página de prueba {i + 1}", styles['question']))
+        flow.append(PageBreak())
+    doc = quiz_pdf.new_doc(path)
+    start = time.perf_counter()
+    doc.build(flow, onFirstPage=on_page, onLaterPages=on_page)
+    return time.perf_counter() - start, os.path.getsize(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        from PIL import Image
+        logo = os.path.join(tmp, "logo.png")
+        Image.new("RGB", (280, 280), (180, 20, 20)).save(logo)
+        quiz_pdf.LOGO_FILE = logo
+
+        for label, cb in (("por página (antes)", legacy_header_footer),
+                          ("form XObject (después)", quiz_pdf.header_footer)):
+            secs, size = render(os.path.join(tmp, "out.pdf"), args.pages, cb)
+            print(f"{label:<24} {secs:8.3f} s  {size / 1024:10.1f} KiB  {args.pages / secs:8.0f} pág/s")
+
+
+if __name__ == "__main__":
+    main()
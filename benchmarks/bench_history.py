@@ -0,0 +1,81 @@
+"""
+Memoria y tiempo del historial de deshacer (quiz_history) sobre un banco
+grande, frente a guardar una copia profunda del banco en cada paso.
+
+    python benchmarks/bench_history.py --size 100000 --steps 200
+"""
+import argparse
+import copy
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from quiz_history import History  # noqa: E402
+from benchmarks.synthetic import synthetic_bank  # noqa: E402
+
+
+def edit_steps(questions, history, steps, rng):
+    """Ediciones y borrados sueltos, como los de la interfaz, cada uno un paso."""
+    for k in range(steps):
+        i = rng.randrange(len(questions))
+        if k % 2:
+            old = questions.pop(i)
+            history.record([("delete", old, {"i": i})])
+        else:
+            old = questions[i]
+            questions[i] = dict(old, pregunta=old["pregunta"] + " (editada)")
+            history.record([("edit", old, {"i": i, "q": questions[i]})])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, default=100000)
+    parser.add_argument("--steps", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    questions = synthetic_bank(args.size)
+    original = list(questions)
+    history = History()
+
+    tracemalloc.start()
+    edit_steps(questions, history, args.steps, rng)
+    edits = tracemalloc.get_traced_memory()[0]
+    order = list(range(len(questions)))
+    rng.shuffle(order)
+    questions[:] = [questions[i] for i in order]
+    history.record([("reorder", None, {"order": order})])
+    del order
+    shuffle = tracemalloc.get_traced_memory()[0] - edits
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    snapshot = copy.deepcopy(questions)
+    deep = tracemalloc.get_traced_memory()[0]
+    del snapshot
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    while history.undo(questions):
+        pass
+    undone = time.perf_counter() - start
+    assert questions == original
+    start = time.perf_counter()
+    while history.redo(questions):
+        pass
+    redone = time.perf_counter() - start
+
+    print(f"banco de {args.size} preguntas, {args.steps} ediciones/borrados y una mezcla")
+    print(f"  historial de ediciones   {edits / 2 ** 10:10.1f} KB ({edits / args.steps:.0f} B por paso)")
+    print(f"  paso de la mezcla        {shuffle / 2 ** 10:10.1f} KB")
+    print(f"  copia profunda del banco {deep / 2 ** 10:10.1f} KB (por paso, sin historial)")
+    print(f"  deshacer todo            {undone * 1000:10.1f} ms")
+    print(f"  rehacer todo             {redone * 1000:10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Compara el cargador original (json.load + bucle que se detiene en el primer
+error) con read_questions usando json de la biblioteca estándar y orjson.
+
+    python benchmarks/bench_loader.py --size 100000
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import quiz_bank  # noqa: E402
+from benchmarks.synthetic import write_bank  # noqa: E402
+
+
+def legacy_load(path):
+    # copia del bucle de load_questions anterior, sin los diálogos
+    with open(path, "r", encoding="utf-8") as f:
+        raw = json.load(f)
+    normalized = []
+    for item in raw:
+        pregunta = item.get("pregunta") or item.get("question") or ""
+        opciones = item.get("opciones") or item.get("options") or []
+        respuesta = item.get("respuesta") or item.get("answer") or ""
+        if not pregunta or len(opciones) < 2:
+            raise ValueError("pregunta inválida")
+        if not respuesta:
+            respuesta = opciones[0]
+        normalized.append({"pregunta": pregunta, "opciones": opciones, "respuesta": respuesta})
+    return normalized
+
+
+def best_of(fn, path, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(path)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_bank(os.path.join(tmp, "bank.json"), args.size)
+        print(f"banco sintético: {args.size} preguntas, {os.path.getsize(path) / 2**20:.1f} MiB")
+
+        fast = quiz_bank.orjson
+        results = [("anterior (json.load)", best_of(legacy_load, path, args.repeat))]
+        quiz_bank.orjson = None
+        results.append(("read_questions + json", best_of(quiz_bank.read_questions, path, args.repeat)))
+        quiz_bank.orjson = fast
+        if fast is not None:
+            results.append(("read_questions + orjson", best_of(quiz_bank.read_questions, path, args.repeat)))
+        else:
+            print("(orjson no está instalado; se omite)")
+        for label, secs in results:
+            print(f"{label:<26} {secs * 1000:9.1f} ms  {args.size / secs:12.0f} preguntas/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Memoria del banco en memoria: lista de dicts (formato JSON) frente a
+QuestionBank (textos + ids enteros de opciones internadas), y costo de
+mezclar preguntas y opciones en cada representación.
+
+    python benchmarks/bench_memory.py --size 1000000
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from quiz_bank import QuestionBank  # noqa: E402
+from benchmarks.synthetic import synthetic_bank  # noqa: E402
+
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    obj = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return obj, size
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, default=200000)
+    parser.add_argument("--option-pool", type=int, default=5000,
+                        help="opciones distintas en el banco sintético (0 = todas distintas)")
+    args = parser.parse_args()
+
+    # la lista de dicts se obtiene como al cargar el JSON (una cadena por cada
+    # aparición de cada opción); QuestionBank comparte los textos de las
+    # preguntas con ella, así que se suman aparte
+    payload = json.dumps(synthetic_bank(args.size, option_pool=args.option_pool), ensure_ascii=False)
+    dicts, dict_size = measure(lambda: json.loads(payload))
+    del payload
+    bank, bank_size = measure(lambda: QuestionBank.from_questions(dicts))
+    bank_size += sum(sys.getsizeof(t) for t in bank.texts)
+
+    rng = random.Random(1)
+    print(f"{args.size} preguntas, {len(bank.option_table)} opciones distintas")
+    print(f"{'lista de dicts':<16} {dict_size / 2**20:9.1f} MiB  "
+          f"mezclar preguntas {timed(lambda: rng.shuffle(dicts)) * 1000:7.1f} ms  "
+          f"opciones {timed(lambda: [rng.shuffle(q['opciones']) for q in dicts]) * 1000:7.1f} ms")
+    print(f"{'QuestionBank':<16} {bank_size / 2**20:9.1f} MiB  "
+          f"mezclar preguntas {timed(lambda: bank.shuffle_questions(rng)) * 1000:7.1f} ms  "
+          f"opciones {timed(lambda: bank.shuffle_options(rng)) * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Exportación de muchas versiones con y sin el caché de markup de párrafos
+(quiz_pdf.prefixed_paragraph): sin caché, con el caché vacío (primera
+exportación) y con el caché ya lleno (exportación repetida en la sesión).
+
+    python benchmarks/bench_paragraphs.py --versions 200 --questions 50
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import quiz_pdf  # noqa: E402
+from quiz_versions import generate_versions  # noqa: E402
+from benchmarks.synthetic import synthetic_bank  # noqa: E402
+
+
+def legacy_paragraph(prefix, text, style):
+    # comportamiento anterior: cada versión vuelve a parsear el texto completo
+    from reportlab.platypus import Paragraph
+    return Paragraph(prefix + text, style)
+
+
+def export(versions, path, paragraph):
+    quiz_pdf.prefixed_paragraph, original = paragraph, quiz_pdf.prefixed_paragraph
+    try:
+        start = time.perf_counter()
+        quiz_pdf.render_versions_pdf(versions, path)
+        return time.perf_counter() - start
+    finally:
+        quiz_pdf.prefixed_paragraph = original
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--versions", type=int, default=200)
+    parser.add_argument("--questions", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=3, help="corridas por caso (se toma la mejor)")
+    args = parser.parse_args()
+
+    versions = generate_versions(synthetic_bank(args.questions), args.versions, seed=1)
+    cached = quiz_pdf.prefixed_paragraph
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "versiones.pdf")
+        # calienta ReportLab (fuentes, estilos) fuera de la medición
+        export(versions[:1], path, legacy_paragraph)
+
+        # los tres casos se alternan para que la deriva de la máquina los afecte por igual
+        legacy, cold, warm = [], [], []
+        for _ in range(args.repeat):
+            legacy.append(export(versions, path, legacy_paragraph))
+            quiz_pdf._parsed_markup.cache_clear()
+            cold.append(export(versions, path, cached))
+            warm.append(export(versions, path, cached))
+        legacy, cold, warm = min(legacy), min(cold), min(warm)
+        info = quiz_pdf._parsed_markup.cache_info()
+
+    print(f"{args.versions} versiones de {args.questions} preguntas")
+    for label, elapsed in (("sin caché", legacy), ("caché vacío", cold), ("caché lleno", warm)):
+        print(f"  {label:<14} {elapsed:7.2f} s   {legacy / elapsed:5.2f}x")
+    print(f"  textos parseados: {info.misses}, reutilizados: {info.hits}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Latencia de la búsqueda del panel lateral (SearchIndex) sobre un banco
+sintético: construcción del índice, consultas mientras se escribe y
+consultas tras reordenar y borrar.
+
+    python benchmarks/bench_search.py --size 100000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from quiz_search import SearchIndex  # noqa: E402
+from benchmarks.synthetic import synthetic_bank  # noqa: E402
+
+QUERIES = ("r", "re", "red", "router", "ÁRBOL trama", "arbol trama grafo red", "direc", "12345", "arbol 5000", "zzz")
+
+
+def report(index, repeat):
+    worst = 0.0
+    for query in QUERIES:
+        index.search(query)
+        start = time.perf_counter()
+        for _ in range(repeat):
+            result = index.search(query)
+        elapsed = (time.perf_counter() - start) / repeat * 1000
+        worst = max(worst, elapsed)
+        hits = "sin filtro" if result is None else f"{len(result)} resultados"
+        print(f"  {query!r:<26} {elapsed:7.2f} ms  {hits}")
+    print(f"  peor consulta: {worst:.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    questions = synthetic_bank(args.size)
+    start = time.perf_counter()
+    index = SearchIndex(questions)
+    print(f"{args.size} preguntas, índice construido en {time.perf_counter() - start:.2f} s "
+          f"({len(index.postings)} palabras)")
+    print("banco sin cambios:")
+    report(index, args.repeat)
+
+    index.reorder(list(range(len(questions)))[::-1])
+    index.delete(0, questions[-1])
+    print("tras reordenar y borrar:")
+    report(index, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Mide el tiempo de importación de app_final (arranque de la GUI antes de
+crear la ventana) usando `python -X importtime`, y qué módulos pesan más.
+
+    python benchmarks/bench_startup.py --runs 5
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_times(module):
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          cwd=ROOT, capture_output=True, text=True, check=True)
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--module", default="app_final")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    runs = [import_times(args.module) for _ in range(args.runs)]
+    totals = sorted(r[args.module] for r in runs)
+    print(f"import {args.module}: mediana {totals[len(totals) // 2] / 1000:.1f} ms "
+          f"(mín {totals[0] / 1000:.1f} ms, {args.runs} ejecuciones)")
+    loaded = runs[-1]
+    for name in ("tkinter", "reportlab", "multiprocessing", "pypdf", "numpy"):
+        print(f"  {name:<16} {'cargado' if name in loaded else 'no cargado'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Suite de benchmarks de punta a punta: carga, normalización, generación de
+versiones y exportación a PDF sobre bancos sintéticos de varios tamaños.
+
+Para cada tamaño de banco mide el tiempo de cada etapa (el mejor de
+varias corridas mientras no pasen de un segundo) y, en otra pasada con
+tracemalloc (que la vuelve más lenta), su pico de memoria. No
+importa tkinter, así que corre sin pantalla. Con --json guarda los
+resultados y con --compare los contrasta con una corrida anterior para
+ver si un cambio hizo algo más rápido o más lento.
+
+    python benchmarks/bench_suite.py --json antes.json
+    python benchmarks/bench_suite.py --sizes 1000,10000 --compare antes.json
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from quiz_bank import parse_json, read_questions, validate_questions  # noqa: E402
+from quiz_pdf import ExportProgress, render_versions_pdf  # noqa: E402
+from quiz_versions import StratifiedSampler, freeze_bank, generate_versions  # noqa: E402
+from benchmarks.synthetic import write_bank  # noqa: E402
+
+# diferencia relativa a partir de la cual --compare marca una etapa
+NOISE = 0.10
+# una etapa se repite (hasta --repeat veces) mientras el total no pase de esto
+BUDGET_S = 1.0
+
+
+def parse_list(text):
+    return [int(part) for part in text.split(",") if part.strip()]
+
+
+def measure(stage, memory, repeat):
+    """(segundos, pico en MB o None) de stage(); el pico se mide en otra corrida."""
+    times = []
+    while not times or (len(times) < repeat and sum(times) < BUDGET_S):
+        gc.collect()
+        start = time.perf_counter()
+        stage()
+        times.append(time.perf_counter() - start)
+    elapsed = min(times)
+    peak = None
+    if memory:
+        gc.collect()
+        tracemalloc.start()
+        try:
+            stage()
+            peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        finally:
+            tracemalloc.stop()
+    return elapsed, peak
+
+
+def alias_items(raw):
+    """El banco con las claves en inglés: obliga a validate_questions a construir cada dict."""
+    return [{"question": q["pregunta"], "options": q["opciones"], "answer": q["respuesta"]} for q in raw]
+
+
+def run_size(size, version_counts, args, tmp):
+    path = write_bank(os.path.join(tmp, f"banco_{size}.json"), size)
+    with open(path, "rb") as f:
+        data = f.read()
+    raw = parse_json(data)
+    aliased = alias_items(raw)
+    questions = read_questions(path)  # también deja escrito el caché
+    bank = freeze_bank(questions)
+    stages = [
+        ("cargar JSON (sin caché)", lambda: read_questions(path, use_cache=False), {}),
+        ("cargar (con caché)", lambda: read_questions(path), {}),
+        ("normalizar", lambda: validate_questions(raw), {}),
+        ("normalizar (alias)", lambda: validate_questions(aliased), {}),
+        ("QuestionBank", lambda: freeze_bank(questions), {}),
+    ]
+    for count in version_counts:
+        if args.limit and count * size > args.limit:
+            stages.append((f"generar {count} versiones", None, {}))
+            continue
+        stages.append((f"generar {count} versiones", lambda count=count: generate_versions(bank, count, seed=1),
+                       {"versiones/s": count}))
+
+    pages = []
+    sampler = StratifiedSampler(bank, min(args.pdf_questions, size))
+    pdf_versions = generate_versions(bank, args.pdf_versions, seed=1, sampler=sampler)
+
+    def render(versions=pdf_versions):
+        progress = ExportProgress(len(versions))
+        render_versions_pdf(versions, os.path.join(tmp, "versiones.pdf"), progress=progress)
+        pages.append(progress.pages)
+
+    render(pdf_versions[:1])  # calienta ReportLab (fuentes, imágenes) fuera de la medición
+    pages.clear()
+
+    stages.append((f"PDF {args.pdf_versions}x{sampler.size} preguntas", render, {}))
+
+    results = {}
+    for name, stage, rates in stages:
+        if stage is None:
+            results[name] = None
+            continue
+        elapsed, peak = measure(stage, not args.no_memory, args.repeat)
+        result = {"s": elapsed, "pico_mb": peak}
+        for unit, amount in rates.items():
+            result[unit] = amount / elapsed
+        if stage is render:
+            result["páginas/s"] = pages[0] / elapsed
+        results[name] = result
+    return results
+
+
+def format_row(name, result, baseline):
+    if result is None:
+        return f"  {name:<30} omitido (--limit)"
+    peak = "" if result["pico_mb"] is None else f"{result['pico_mb']:9.1f} MB"
+    rate = "".join(f"  {value:9.1f} {unit}" for unit, value in result.items() if unit.endswith("/s"))
+    line = f"  {name:<30} {result['s'] * 1000:10.1f} ms {peak}{rate}"
+    if baseline and baseline.get(name):
+        ratio = result["s"] / baseline[name]["s"]
+        mark = "más lento" if ratio > 1 + NOISE else "más rápido" if ratio < 1 - NOISE else "igual"
+        line += f"   {ratio:5.2f}x ({mark})"
+    return line
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=parse_list, default=[1000, 10000, 100000],
+                        help="tamaños de banco separados por comas")
+    parser.add_argument("--versions", type=parse_list, default=[10, 100, 500],
+                        help="cantidades de versiones a generar, separadas por comas")
+    parser.add_argument("--limit", type=int, default=None,
+                        help="omite las generaciones con más de este número de preguntas x versiones")
+    parser.add_argument("--pdf-versions", type=int, default=10)
+    parser.add_argument("--pdf-questions", type=int, default=100,
+                        help="preguntas por versión en el PDF (muestreadas del banco)")
+    parser.add_argument("--repeat", type=int, default=5, help="corridas máximas por etapa (se toma la mejor)")
+    parser.add_argument("--no-memory", action="store_true", help="no mide el pico de memoria (más rápido)")
+    parser.add_argument("--json", default=None, help="guarda los resultados en este archivo")
+    parser.add_argument("--compare", default=None, help="resultados de una corrida anterior (--json)")
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)["resultados"]
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            print(f"banco de {size} preguntas:", flush=True)
+            results[str(size)] = run_size(size, args.versions, args, tmp)
+            for name, result in results[str(size)].items():
+                print(format_row(name, result, baseline.get(str(size))), flush=True)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"python": sys.version.split()[0], "resultados": results}, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Recarga de un banco editado por fuera: completa (releer y reconstruir el
+índice de búsqueda, como hacía "Recargar desde JSON") frente a la
+incremental de quiz_watch (releer, comparar y aplicar solo los cambios).
+
+    python benchmarks/bench_watch.py --size 100000 --changes 20
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from quiz_bank import apply_ops, read_questions, write_questions  # noqa: E402
+from quiz_search import SearchIndex  # noqa: E402
+from quiz_watch import diff_banks  # noqa: E402
+from benchmarks.synthetic import write_bank  # noqa: E402
+
+
+def external_edit(questions, changes, seed=0):
+    """Copia del banco con changes ediciones, altas, bajas y movimientos al azar."""
+    rng = random.Random(seed)
+    edited = list(questions)
+    for k in range(changes):
+        i = rng.randrange(len(edited))
+        kind = k % 4
+        if kind == 0:
+            edited[i] = dict(edited[i], pregunta=edited[i]["pregunta"] + " (revisada)")
+        elif kind == 1:
+            edited.insert(i, {"pregunta": f"Pregunta nueva {k}", "opciones": ["sí", "no"], "respuesta": "sí"})
+        elif kind == 2:
+            del edited[i]
+        else:
+            edited.insert(rng.randrange(len(edited)), edited.pop(i))
+    return edited
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, default=100000)
+    parser.add_argument("--changes", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_bank(os.path.join(tmp, "questions.json"), args.size)
+        questions = read_questions(path)
+        index = SearchIndex(questions)
+        write_questions(external_edit(questions, args.changes), path)
+        read_questions(path)  # deja escrito el caché, como tras el primer sondeo
+
+        start = time.perf_counter()
+        SearchIndex(read_questions(path))
+        full = time.perf_counter() - start
+
+        start = time.perf_counter()
+        fresh = read_questions(path)
+        read = time.perf_counter() - start
+        start = time.perf_counter()
+        diff = diff_banks(questions, fresh)
+        compared = time.perf_counter() - start
+        start = time.perf_counter()
+        apply_ops(questions, [dict(op=op, **fields) for op, _, fields in diff.changes])
+        for op, old, fields in diff.changes:
+            index.apply(op, old, **fields)
+        applied = time.perf_counter() - start
+        assert questions == fresh
+
+    incremental = read + compared + applied
+    print(f"banco de {args.size} preguntas, {args.changes} cambios externos ({diff.summary()})")
+    print(f"  recarga completa     {full * 1000:9.1f} ms")
+    print(f"  recarga incremental  {incremental * 1000:9.1f} ms   {full / incremental:5.2f}x")
+    for label, elapsed in (("leer", read), ("comparar", compared), ("aplicar", applied)):
+        print(f"    {label:<18} {elapsed * 1000:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
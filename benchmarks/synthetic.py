@@ -0,0 +1,35 @@
+"""
+Generador de bancos sintéticos para los benchmarks.
+"""
+import json
+import random
+
+WORDS = ("red", "router", "switch", "paquete", "trama", "capa", "protocolo", "dirección",
+         "servidor", "cliente", "puerto", "enlace", "conjunto", "grafo", "árbol", "relación")
+
+
+def synthetic_bank(n, options=4, seed=0, option_pool=None):
+    """
+    n preguntas de `options` opciones. Con option_pool las opciones se eligen
+    de un conjunto fijo de ese tamaño (como "Router", "Switch"... en un banco
+    real); si no, cada opción es distinta.
+    """
+    rng = random.Random(seed)
+    pool = None
+    if option_pool:
+        pool = [" ".join(rng.choices(WORDS, k=2)) + f" #{k}" for k in range(option_pool)]
+    bank = []
+    for i in range(n):
+        pregunta = f"{i}. ¿" + " ".join(rng.choices(WORDS, k=10)) + "?"
+        if pool:
+            opciones = rng.sample(pool, options)
+        else:
+            opciones = [" ".join(rng.choices(WORDS, k=3)) + f" {i}-{j}" for j in range(options)]
+        bank.append({"pregunta": pregunta, "opciones": opciones, "respuesta": rng.choice(opciones)})
+    return bank
+
+
+def write_bank(path, n, options=4, seed=0):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(synthetic_bank(n, options, seed), f, ensure_ascii=False, indent=2)
+    return path
@@ -0,0 +1,642 @@
+import contextlib
+import gc
+import hashlib
+import json
+import marshal
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+from array import array
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def resource_path(relative_path: str) -> str:
+    """
+    Devuelve la ruta absoluta al recurso, considerando si la app está
+    empaquetada con PyInstaller (sys._MEIPASS) o ejecutándose desde el código fuente.
+    """
+    # cuando PyInstaller empaqueta, crea sys._MEIPASS
+    if hasattr(sys, "_MEIPASS"):
+        base_path = sys._MEIPASS
+    else:
+        
+        base_path = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(base_path, relative_path)
+
+
+BASE_DIR = resource_path("")
+
+
+QUESTIONS_FILE = resource_path("questions.json")
+SAVED_ORDER_FILE = resource_path("questions_saved_order.json")
+LOGO_FILE = resource_path("univalle_logo.png")
+
+SAMPLE_QUESTIONS = [
+    {"pregunta": "¿Cuál es la capital de Francia?",
+     "opciones": ["París", "Londres", "Roma", "Berlín"], "respuesta": "París"},
+    {"pregunta": "¿Cuál es el océano más grande del mundo?",
+     "opciones": ["Atlántico", "Índico", "Pacífico", "Ártico"], "respuesta": "Pacífico"},
+    {"pregunta": "¿Cuánto es 5 * 3?",
+     "opciones": ["8", "15", "10", "20"], "respuesta": "15"}
+]
+
+
+def write_sample_questions(path=QUESTIONS_FILE):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(SAMPLE_QUESTIONS, f, ensure_ascii=False, indent=2)
+
+
+class BankValidationError(ValueError):
+    """
+    El banco tiene elementos inválidos. errors es la lista completa de
+    (índice, mensaje), con índices base 0 dentro del arreglo JSON.
+    """
+
+    def __init__(self, errors, shown=10):
+        self.errors = errors
+        super().__init__(f"{len(errors)} pregunta(s) inválida(s):\n" + format_items(errors, shown))
+
+
+def format_items(items, shown=10):
+    """Líneas "#n: mensaje" de una lista de (índice, mensaje), con a lo sumo shown."""
+    lines = [f"  #{i + 1}: {msg}" for i, msg in items[:shown]]
+    if len(items) > shown:
+        lines.append(f"  ... y {len(items) - shown} más")
+    return "\n".join(lines)
+
+
+def parse_json(data):
+    """Decodifica bytes JSON con orjson si está instalado y con json en caso contrario."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+_CANONICAL_KEYS = {"pregunta", "opciones", "respuesta"}
+# campos opcionales para estratificar el muestreo de versiones
+META_KEYS = ("tema", "dificultad")
+_SCHEMA_KEYS = _CANONICAL_KEYS.union(META_KEYS)
+# valores que se aceptan (y se convierten a texto) en pregunta, opciones y respuesta
+_SCALARS = (str, int, float)
+
+
+def validate_questions(raw):
+    """
+    Normaliza los alias (pregunta/question, opciones/options,
+    respuesta/answer, tema/topic, dificultad/difficulty) y valida todo el
+    banco en una sola pasada. Devuelve (preguntas_normalizadas, errores)
+    sin detenerse en el primer elemento inválido.
+
+    pregunta, opciones y respuesta se convierten a texto si son números;
+    cualquier otro tipo es un error. tema y dificultad son opcionales
+    (texto o número) y solo aparecen en el dict normalizado cuando la
+    pregunta los tiene. Una respuesta que no está entre las opciones no es
+    un error: la pregunta se conserva (en la clave sale como N/A) y se
+    informa con answer_warnings.
+    """
+    if not isinstance(raw, list):
+        raise ValueError("El JSON debe contener una lista de preguntas")
+
+    normalized = []
+    errors = []
+    append = normalized.append
+    for i, item in enumerate(raw):
+        if not isinstance(item, dict):
+            errors.append((i, "formato inválido: cada elemento debe ser un objeto (dict)"))
+            continue
+        get = item.get
+        pregunta = get("pregunta") or get("question") or ""
+        opciones = get("opciones") or get("options") or []
+        respuesta = get("respuesta") or get("answer") or ""
+        if not isinstance(opciones, list):
+            opciones = list(opciones) if opciones is not None else []
+        if type(pregunta) is not str or type(respuesta) is not str or any(type(o) is not str for o in opciones):
+            if not isinstance(pregunta, _SCALARS) or not isinstance(respuesta, _SCALARS) \
+                    or not all(isinstance(o, _SCALARS) for o in opciones):
+                errors.append((i, "'pregunta', 'opciones' y 'respuesta' deben ser textos o números"))
+                continue
+            pregunta, respuesta, opciones = str(pregunta), str(respuesta), [str(o) for o in opciones]
+        if not pregunta:
+            errors.append((i, "falta 'pregunta' (o 'question')"))
+            continue
+        if len(opciones) < 2:
+            errors.append((i, "se necesitan al menos 2 'opciones' (o 'options')"))
+            continue
+        if not respuesta:
+            respuesta = opciones[0]
+        tema = get("tema", get("topic"))
+        dificultad = get("dificultad", get("difficulty"))
+        if not isinstance(tema, (str, int, type(None))) or isinstance(tema, bool):
+            errors.append((i, "'tema' debe ser un texto o un número"))
+            continue
+        if not isinstance(dificultad, (str, int, type(None))) or isinstance(dificultad, bool):
+            errors.append((i, "'dificultad' debe ser un texto o un número entero"))
+            continue
+        keys = item.keys()
+        if (keys == _CANONICAL_KEYS or _CANONICAL_KEYS < keys <= _SCHEMA_KEYS) \
+                and item["pregunta"] is pregunta and item["respuesta"] is respuesta and item["opciones"] is opciones \
+                and tema != "" and dificultad != "":
+            # ya viene normalizado: se reutiliza el dict recién decodificado
+            append(item)
+        else:
+            q = {
+                "pregunta": pregunta,
+                "opciones": opciones,
+                "respuesta": respuesta
+            }
+            if tema not in (None, ""):
+                q["tema"] = tema
+            if dificultad not in (None, ""):
+                q["dificultad"] = dificultad
+            append(q)
+    return normalized, errors
+
+
+def answer_warnings(questions):
+    """(índice, mensaje) de las preguntas normalizadas cuya respuesta no está entre sus opciones."""
+    return [(i, f"la respuesta {q['respuesta']!r} no está entre las opciones")
+            for i, q in enumerate(questions) if q["respuesta"] not in q["opciones"]]
+
+
+@contextlib.contextmanager
+def _gc_paused():
+    # el banco crea cientos de miles de contenedores que nunca forman ciclos;
+    # pausar el recolector evita pasadas de GC inútiles durante la carga
+    was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if was_enabled:
+            gc.enable()
+
+
+CACHE_FORMAT = 4
+
+
+def cache_path(path):
+    """Ruta del caché binario de un banco: .<nombre>.cache en la misma carpeta."""
+    folder, name = os.path.split(os.path.abspath(path))
+    return os.path.join(folder, f".{name}.cache")
+
+
+def _cache_key(path, st):
+    return (CACHE_FORMAT, tuple(sys.version_info[:2]), os.path.abspath(path), st.st_mtime_ns, st.st_size)
+
+
+def _read_cache(path, st, data=None):
+    """
+    Devuelve las preguntas guardadas en el caché si sigue siendo válido, o
+    None. Sin data solo se compara (ruta, mtime, tamaño); con data se acepta
+    también un caché cuyo hash de contenido coincide (archivo tocado pero
+    no modificado).
+    """
+    try:
+        with open(cache_path(path), "rb") as f:
+            size = int.from_bytes(f.read(4), "little")
+            key, digest = marshal.loads(f.read(size))
+            valid = key == _cache_key(path, st)
+            if not valid and data is not None:
+                valid = key[:3] == _cache_key(path, st)[:3] and digest == hashlib.sha256(data).hexdigest()
+            if valid:
+                with _gc_paused():
+                    preguntas, opciones, respuestas, meta = marshal.loads(f.read())
+                    questions = [{"pregunta": p, "opciones": o, "respuesta": r}
+                                 for p, o, r in zip(preguntas, opciones, respuestas)]
+                    for key, column in zip(META_KEYS, meta):
+                        if column is not None:
+                            for q, value in zip(questions, column):
+                                if value is not None:
+                                    q[key] = value
+                    return questions
+    except (OSError, EOFError, ValueError, TypeError):
+        pass
+    return None
+
+
+def _write_cache(path, st, data, questions):
+    target = cache_path(path)
+    tmp = f"{target}.{os.getpid()}.tmp"
+    try:
+        header = marshal.dumps((_cache_key(path, st), hashlib.sha256(data).hexdigest()))
+        with open(tmp, "wb") as f:
+            f.write(len(header).to_bytes(4, "little"))
+            f.write(header)
+            # por columnas: marshal carga listas planas más rápido que una lista de dicts;
+            # las columnas opcionales (tema, dificultad) son None si ninguna pregunta las usa
+            meta = []
+            for key in META_KEYS:
+                column = [q.get(key) for q in questions]
+                meta.append(column if any(v is not None for v in column) else None)
+            f.write(marshal.dumps(([q["pregunta"] for q in questions],
+                                   [q["opciones"] for q in questions],
+                                   [q["respuesta"] for q in questions],
+                                   tuple(meta))))
+        os.replace(tmp, target)
+    except (OSError, ValueError):
+        # sin permisos de escritura (p. ej. dentro del ejecutable): se trabaja sin caché
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+
+
+def read_questions(path=QUESTIONS_FILE, use_cache=True):
+    """
+    Lee y normaliza el banco de preguntas. A diferencia de load_questions
+    (en app_final) no muestra diálogos: los errores se propagan como
+    excepciones (FileNotFoundError, ValueError, BankValidationError con
+    todos los elementos inválidos, ...).
+
+    Con use_cache el banco normalizado se guarda junto al archivo (ver
+    cache_path) y se reutiliza mientras ruta, mtime, tamaño y hash del
+    contenido sigan coincidiendo; si no, se vuelve a parsear y se reescribe.
+    Las operaciones pendientes del diario de cambios (ver BankJournal) se
+    aplican encima.
+    """
+    questions = _read_base(path, use_cache)
+    ops = read_journal(path)
+    if ops:
+        apply_ops(questions, ops)
+    return questions
+
+
+def _read_base(path, use_cache):
+    st = os.stat(path)
+    if use_cache:
+        cached = _read_cache(path, st)
+        if cached is not None:
+            return cached
+
+    with open(path, "rb") as f:
+        data = f.read()
+
+    if use_cache:
+        cached = _read_cache(path, st, data)
+        if cached is not None:
+            _write_cache(path, st, data, cached)
+            return cached
+
+    with _gc_paused():
+        normalized, errors = validate_questions(parse_json(data))
+    if errors:
+        raise BankValidationError(errors)
+    if use_cache:
+        _write_cache(path, st, data, normalized)
+    return normalized
+
+
+class QuestionBank:
+    """
+    Banco en memoria con estructura de arreglos: cada pregunta guarda su
+    texto, los ids enteros de sus opciones y el índice de la respuesta; el
+    texto de cada opción distinta se guarda una sola vez en option_table.
+
+    order contiene los ids de pregunta en el orden actual, así que mezclar
+    preguntas u opciones solo mueve enteros pequeños. Se convierte desde y
+    hacia la lista de dicts del formato JSON con from_questions/to_questions.
+
+    El (tema, dificultad) opcional de cada pregunta se guarda como id de
+    estrato: strata[strata_of[qid]]; el estrato (None, None) es el 0.
+    """
+    __slots__ = ("texts", "opt_start", "opt_ids", "answers", "option_table",
+                 "option_index", "loose_answers", "order", "strata", "strata_index", "strata_of", "digest")
+
+    def __init__(self):
+        self.texts = []
+        self.opt_start = array('I', [0])
+        self.opt_ids = array('I')
+        self.answers = array('b')
+        self.option_table = []
+        self.option_index = {}
+        # respuestas que no están entre las opciones (bancos antiguos): {id: texto}
+        self.loose_answers = {}
+        self.order = array('I')
+        self.strata = [(None, None)]
+        self.strata_index = {(None, None): 0}
+        self.strata_of = array('I')
+        # huella calculada por fingerprint(); se descarta al modificar el banco
+        self.digest = None
+
+    @classmethod
+    def from_questions(cls, questions):
+        bank = cls()
+        for q in questions:
+            bank.append(q['pregunta'], q['opciones'], q.get('respuesta', ''),
+                        q.get('tema'), q.get('dificultad'))
+        return bank
+
+    def append(self, pregunta, opciones, respuesta, tema=None, dificultad=None):
+        qid = len(self.texts)
+        index = self.option_index
+        table = self.option_table
+        ids = []
+        for opt in opciones:
+            oid = index.get(opt)
+            if oid is None:
+                oid = index[opt] = len(table)
+                table.append(opt)
+            ids.append(oid)
+        self.texts.append(pregunta)
+        self.opt_ids.extend(ids)
+        self.opt_start.append(len(self.opt_ids))
+        aid = index.get(respuesta)
+        if aid is not None and aid in ids:
+            self.answers.append(ids.index(aid))
+        else:
+            self.answers.append(-1)
+            self.loose_answers[qid] = respuesta
+        stratum = (tema, dificultad)
+        sid = self.strata_index.get(stratum)
+        if sid is None:
+            sid = self.strata_index[stratum] = len(self.strata)
+            self.strata.append(stratum)
+        self.strata_of.append(sid)
+        self.order.append(qid)
+        self.digest = None
+        return qid
+
+    def __len__(self):
+        return len(self.order)
+
+    def option_count(self, qid):
+        return self.opt_start[qid + 1] - self.opt_start[qid]
+
+    def options(self, qid):
+        """Textos de las opciones de la pregunta qid, en su orden actual."""
+        table = self.option_table
+        return [table[i] for i in self.opt_ids[self.opt_start[qid]:self.opt_start[qid + 1]]]
+
+    def answer_text(self, qid):
+        ans = self.answers[qid]
+        if ans < 0:
+            return self.loose_answers.get(qid, "")
+        return self.option_table[self.opt_ids[self.opt_start[qid] + ans]]
+
+    def question(self, qid):
+        """La pregunta qid en el formato clásico de dict."""
+        q = {"pregunta": self.texts[qid], "opciones": self.options(qid), "respuesta": self.answer_text(qid)}
+        for key, value in zip(META_KEYS, self.strata[self.strata_of[qid]]):
+            if value is not None:
+                q[key] = value
+        return q
+
+    def __getitem__(self, pos):
+        return self.question(self.order[pos])
+
+    def __iter__(self):
+        for qid in self.order:
+            yield self.question(qid)
+
+    def to_questions(self):
+        """Lista de dicts compatible con el JSON del banco, en el orden actual."""
+        return list(self)
+
+    def fingerprint(self):
+        """
+        Huella corta (8 dígitos hexadecimales) del contenido del banco en su
+        orden actual: textos, opciones en su orden, respuestas, tema y
+        dificultad. Las versiones de una semilla solo se pueden regenerar con
+        un banco de la misma huella.
+        """
+        if self.digest is None:
+            rows = [[self.texts[qid], self.options(qid), self.answer_text(qid), *self.strata[self.strata_of[qid]]]
+                    for qid in self.order]
+            data = json.dumps(rows, separators=(",", ":")).encode("ascii")
+            self.digest = hashlib.sha256(data).hexdigest()[:8]
+        return self.digest
+
+    def shuffle_questions(self, rng=random):
+        rng.shuffle(self.order)
+        self.digest = None
+
+    def shuffle_options(self, rng=random):
+        self.digest = None
+        ids = self.opt_ids
+        starts = self.opt_start
+        answers = self.answers
+        shuffle = rng.shuffle
+        for qid in range(len(self.texts)):
+            start, end = starts[qid], starts[qid + 1]
+            seg = ids[start:end]
+            ans = answers[qid]
+            if ans >= 0:
+                aid = seg[ans]
+                shuffle(seg)
+                answers[qid] = seg.index(aid)
+            else:
+                shuffle(seg)
+            ids[start:end] = seg
+
+
+def _atomic_write(path, data):
+    """Escribe data (bytes) en un temporal de la misma carpeta, hace fsync y lo renombra sobre path."""
+    folder = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=folder)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.exists(path):
+            shutil.copymode(path, tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def _encode_questions(questions):
+    return json.dumps(questions, ensure_ascii=False, indent=2).encode("utf-8")
+
+
+def write_questions(questions, path=QUESTIONS_FILE):
+    """Guarda el banco completo de forma atómica: un corte a mitad nunca deja el archivo a medias."""
+    _atomic_write(path, _encode_questions(questions))
+
+
+def journal_path(path):
+    """Ruta del diario de cambios de un banco: .<nombre>.journal en la misma carpeta."""
+    folder, name = os.path.split(os.path.abspath(path))
+    return os.path.join(folder, f".{name}.journal")
+
+
+def _base_stamp(path):
+    st = os.stat(path)
+    return [st.st_mtime_ns, st.st_size]
+
+
+def _content_digest(path):
+    """
+    sha256 del contenido del banco. Si el caché corresponde al archivo
+    actual (mtime y tamaño) se toma la que guarda, sin volver a leerlo.
+    """
+    st = os.stat(path)
+    try:
+        with open(cache_path(path), "rb") as f:
+            size = int.from_bytes(f.read(4), "little")
+            key, digest = marshal.loads(f.read(size))
+        if key == _cache_key(path, st):
+            return digest
+    except (OSError, EOFError, ValueError, TypeError):
+        pass
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def read_journal(path):
+    """
+    Operaciones pendientes del diario del banco, o None si no hay diario o si
+    no corresponde a la versión actual del archivo (ya compactado o editado
+    por fuera). Como en el caché, si (mtime, tamaño) no coinciden se acepta
+    un archivo con el mismo hash de contenido (tocado, copiado o restaurado
+    sin cambios). Una última línea truncada por un corte se ignora.
+    """
+    try:
+        with open(journal_path(path), "rb") as f:
+            lines = f.read().splitlines()
+        if not lines:
+            return None
+        header = json.loads(lines[0])
+        if header.get("base") != _base_stamp(path) and header.get("sha256") != _content_digest(path):
+            return None
+    except (OSError, ValueError, AttributeError):
+        return None
+    ops = []
+    for line in lines[1:]:
+        try:
+            ops.append(json.loads(line))
+        except ValueError:
+            break
+    return ops
+
+
+def apply_ops(questions, ops):
+    """Aplica en orden las operaciones del diario sobre la lista de preguntas."""
+    for op in ops:
+        kind = op["op"]
+        if kind == "add":
+            questions.append(op["q"])
+        elif kind == "insert":
+            questions.insert(op["i"], op["q"])
+        elif kind == "edit":
+            questions[op["i"]] = op["q"]
+        elif kind == "delete":
+            del questions[op["i"]]
+        elif kind == "reorder":
+            questions[:] = [questions[i] for i in op["order"]]
+        elif kind == "options":
+            for q, perm in zip(questions, op["perms"]):
+                q["opciones"] = [q["opciones"][i] for i in perm]
+    return questions
+
+
+class BankJournal:
+    """
+    Diario de cambios (una línea JSON por operación) junto al banco. Cada
+    add/edit/delete/reorder cuesta un append con fsync, en O(1) E/S; cuando
+    se acumulan compact_after operaciones, un hilo en segundo plano escribe
+    el banco completo de forma atómica y vacía el diario.
+
+    La cabecera del diario guarda (mtime, tamaño) y el hash del contenido
+    del archivo principal al que se aplica; read_questions reproduce el
+    diario solo si coincide (ver read_journal). Un diario que no coincide
+    no se borra al abrir: se aparta junto al banco (ver discarded).
+
+    Las operaciones usan índices de la lista en memoria, que debe seguir el
+    orden del archivo + diario. Las preguntas registradas no deben mutarse
+    en sitio (se reemplazan), para que compact() pueda serializar una copia
+    superficial de la lista en otro hilo.
+    """
+
+    def __init__(self, path=QUESTIONS_FILE, compact_after=100):
+        self.path = path
+        self.file = journal_path(path)
+        self.compact_after = compact_after
+        self.lock = threading.Lock()
+        self.worker = None
+        # (operaciones, ruta de la copia) de un diario obsoleto apartado al abrir, o None
+        self.discarded = None
+        ops = read_journal(path)
+        if ops is None:
+            self.discarded = self._set_aside()
+            ops = []
+        # se reescribe al abrir: descarta una última línea truncada y actualiza la cabecera
+        self._rewrite(_base_stamp(path), _content_digest(path),
+                      [json.dumps(op, ensure_ascii=False).encode("utf-8") for op in ops])
+        self.pending = len(ops)
+
+    def _set_aside(self):
+        """Renombra un diario con operaciones que no corresponde al banco actual en lugar de perderlo."""
+        try:
+            with open(self.file, "rb") as f:
+                count = sum(1 for line in f.read().splitlines()[1:] if line.strip())
+        except OSError:
+            return None
+        if not count:
+            return None
+        backup = self.file + ".descartado"
+        k = 1
+        while os.path.exists(backup):
+            k += 1
+            backup = f"{self.file}.descartado{k}"
+        os.replace(self.file, backup)
+        return count, backup
+
+    def _rewrite(self, stamp, digest, lines):
+        header = json.dumps({"base": stamp, "sha256": digest}).encode("utf-8")
+        _atomic_write(self.file, b"\n".join([header] + lines) + b"\n")
+
+    def record(self, op, **fields):
+        self.record_many([dict(op=op, **fields)])
+
+    def record_many(self, ops):
+        """Añade varias operaciones ({"op": ..., campos}) con un solo fsync."""
+        data = b"".join(json.dumps(op, ensure_ascii=False).encode("utf-8") + b"\n" for op in ops)
+        with self.lock:
+            with open(self.file, "ab") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            self.pending += len(ops)
+
+    def should_compact(self):
+        return self.pending >= self.compact_after and not (self.worker and self.worker.is_alive())
+
+    def compact(self, questions, background=True):
+        """
+        Vuelca questions (el estado que resulta de archivo + diario) en el
+        archivo principal y elimina del diario las operaciones ya incluidas.
+        """
+        snapshot = list(questions)
+        with self.lock:
+            upto = self.pending
+        if not background:
+            self._compact(snapshot, upto)
+            return
+        self.worker = threading.Thread(target=self._compact, args=(snapshot, upto), daemon=True)
+        self.worker.start()
+
+    def _compact(self, snapshot, upto):
+        try:
+            data = _encode_questions(snapshot)
+            _atomic_write(self.path, data)
+            with self.lock:
+                # lo registrado mientras se escribía el banco se conserva en el nuevo diario
+                with open(self.file, "rb") as f:
+                    rest = f.read().splitlines()[1 + upto:]
+                self._rewrite(_base_stamp(self.path), hashlib.sha256(data).hexdigest(), rest)
+                self.pending = len(rest)
+        except Exception as e:
+            # el diario sigue intacto: nada se pierde, se reintentará en la próxima compactación
+            print(f"ERROR: no se pudo compactar {self.path}: {e}", file=sys.stderr)
@@ -0,0 +1,277 @@
+"""
+Generación de exámenes por línea de comandos, sin interfaz gráfica.
+
+    python -m quiz_cli generate --bank questions.json --versions 300 --seed 42 --out exams/
+    python -m quiz_cli generate --bank questions.json --seed 42 --bank-hash 1a2b3c4d --only 137 --out v137.pdf
+    python -m quiz_cli generate --bank questions.json --versions 500 --balanced --out exams/
+    python -m quiz_cli generate --bank questions.json --versions 100 --questions 40 --stratify tema --out exams/
+    python -m quiz_cli generate --bank questions.json --versions 50 --profile json --out exams/
+    python -m quiz_cli dedup --bank questions.json --merge --out limpio.json
+    python -m quiz_cli merge questions.json exportado.csv otros.jsonl --out fusionado.json
+    python -m quiz_cli grade --bank questions.json --seed 42 --bank-hash 1a2b3c4d --responses hojas.csv --out notas/
+
+No importa tkinter ni crea ninguna ventana; ReportLab solo se carga cuando
+empieza el renderizado. Los errores se escriben en stderr.
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+from quiz_bank import QUESTIONS_FILE, answer_warnings, format_items, read_questions, write_questions
+from quiz_bank import META_KEYS
+from quiz_import import merge_banks
+from quiz_profile import MODES, profiled, stage
+from quiz_versions import (StratifiedSampler, check_fingerprint, freeze_bank, generate_balanced_versions,
+                           generate_versions, new_master_seed, regenerate_versions)
+
+
+def read_bank(args):
+    questions = read_questions(args.bank)
+    if not questions:
+        raise ValueError(f"{args.bank} no contiene preguntas")
+    warnings = answer_warnings(questions)
+    if warnings:
+        print(f"Aviso: {len(warnings)} pregunta(s) con la respuesta fuera de las opciones (en la clave salen "
+              f"como N/A):\n{format_items(warnings)}", file=sys.stderr)
+    return questions
+
+
+def batch_bank(args, questions):
+    """
+    Banco congelado con el que se regenera una tanda: comprueba que su
+    huella sea --bank-hash o, si no se indicó, avisa con la huella actual.
+    """
+    if args.bank_hash:
+        return check_fingerprint(questions, args.bank_hash)
+    bank = freeze_bank(questions)
+    print(f"Aviso: sin --bank-hash no se comprueba que el banco sea el de la tanda; la huella del banco actual "
+          f"es {bank.fingerprint()} y debe coincidir con la de la hoja de claves", file=sys.stderr)
+    return bank
+
+
+def make_sampler(args, questions):
+    if not args.questions:
+        return None
+    return StratifiedSampler(questions, args.questions, by=args.stratify)
+
+
+def balance_constraints(args):
+    return dict(min_order_distance=args.min_order_distance, min_key_distance=args.min_key_distance)
+
+
+def cmd_generate(args):
+    if args.split:
+        target = args.out
+        os.makedirs(target, exist_ok=True)
+    elif args.out.lower().endswith(".pdf"):
+        target = args.out
+        os.makedirs(os.path.dirname(os.path.abspath(target)), exist_ok=True)
+    else:
+        os.makedirs(args.out, exist_ok=True)
+        target = os.path.join(args.out, "versiones.pdf")
+
+    with profiled(target, args.profile) as profile:
+        with stage("cargar banco"):
+            questions = read_bank(args)
+        seed = args.seed if args.seed is not None else new_master_seed()
+        with stage("generar versiones"):
+            if args.only or args.bank_hash:
+                # cada versión se regenera a partir de la semilla maestra y su número
+                questions = batch_bank(args, questions)
+            sampler = make_sampler(args, questions)
+            if args.only:
+                versions = regenerate_versions(questions, args.only, seed, args.balanced, sampler,
+                                               **(balance_constraints(args) if args.balanced else {}))
+            elif args.balanced:
+                versions = generate_balanced_versions(questions, args.versions, seed, sampler=sampler,
+                                                      **balance_constraints(args))
+            else:
+                versions = generate_versions(questions, args.versions, seed, sampler)
+
+        # el import se retrasa hasta aquí para no cargar ReportLab antes de renderizar
+        from quiz_pdf import render_versions_dir, render_versions_pdf
+
+        with stage("renderizar PDF"):
+            if args.split:
+                render_versions_dir(versions, target, title=args.title)
+            else:
+                render_versions_pdf(versions, target, title=args.title, workers=args.workers)
+    print(f"{len(versions)} versiones generadas en {target} (semilla maestra {seed}, "
+          f"huella del banco {versions[0].bank.fingerprint()})")
+    if profile is not None:
+        print(f"Perfil de la exportación: {', '.join(profile.paths)}")
+
+
+def cmd_grade(args):
+    # el import se retrasa para no exigir NumPy a los demás subcomandos
+    from quiz_grading import AnswerKeys, grade, read_responses
+
+    # las claves se regeneran desde la semilla: el banco debe ser el mismo de la tanda
+    questions = batch_bank(args, read_bank(args))
+    students, numbers, letters = read_responses(args.responses)
+    if not students:
+        raise ValueError(f"{args.responses} no contiene hojas de respuestas")
+    versions = regenerate_versions(questions, sorted(set(numbers.tolist())), args.seed, args.balanced, make_sampler(args, questions),
+                                   **(balance_constraints(args) if args.balanced else {}))
+    report = grade(AnswerKeys(versions), students, numbers, letters)
+    os.makedirs(args.out, exist_ok=True)
+    report.write_scores(os.path.join(args.out, "notas.csv"))
+    report.write_items(os.path.join(args.out, "preguntas.csv"))
+    print(report.summary())
+    print(f"Notas en {os.path.join(args.out, 'notas.csv')}, estadísticas por pregunta en "
+          f"{os.path.join(args.out, 'preguntas.csv')}")
+
+
+def cmd_dedup(args):
+    # el import se retrasa para no cargar quiz_dedup (ni NumPy) en los demás subcomandos
+    from quiz_dedup import find_duplicates, format_report, merge_duplicates
+
+    questions = read_questions(args.bank)
+    groups = find_duplicates(questions, threshold=args.threshold, similar=not args.exact_only)
+    report = format_report(groups, questions)
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            f.write(report + "\n")
+    else:
+        print(report)
+    if args.merge:
+        merged, dropped = merge_duplicates(questions, groups, include_similar=args.include_similar)
+        out = args.out or args.bank
+        write_questions(merged, out)
+        print(f"{len(dropped)} preguntas eliminadas; {len(merged)} guardadas en {out}")
+
+
+def cmd_merge(args):
+    def progress(done, total):
+        print(f"\r{done * 100 // max(total, 1)}%", end="", file=sys.stderr, flush=True)
+
+    questions, skipped = merge_banks(args.inputs, skip_duplicates=not args.keep_duplicates,
+                                     progress=None if args.quiet else progress)
+    if not args.quiet:
+        print(file=sys.stderr)
+    write_questions(questions, args.out)
+    print(f"{len(questions)} preguntas guardadas en {args.out} ({skipped} repetidas omitidas)")
+
+
+def parse_threshold(text):
+    try:
+        value = float(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"umbral inválido: {text!r}")
+    if not 0 < value <= 1:
+        raise argparse.ArgumentTypeError("el umbral debe estar entre 0 y 1")
+    return value
+
+
+def parse_numbers(text):
+    try:
+        numbers = [int(part) for part in text.split(",") if part.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"lista de versiones inválida: {text!r}")
+    if not numbers or min(numbers) < 1:
+        raise argparse.ArgumentTypeError("los números de versión empiezan en 1")
+    return numbers
+
+
+def parse_fields(text):
+    fields = tuple(part.strip() for part in text.split(",") if part.strip())
+    unknown = [f for f in fields if f not in META_KEYS]
+    if unknown:
+        raise argparse.ArgumentTypeError(f"campos de estratificación desconocidos: {', '.join(unknown)} "
+                                         f"(válidos: {', '.join(META_KEYS)})")
+    return fields
+
+
+def add_version_options(parser, origin=""):
+    """Opciones que determinan cómo se generan las versiones (deben repetirse al regenerarlas)."""
+    note = f" ({origin})" if origin else ""
+    parser.add_argument("--balanced", action="store_true",
+                        help="balancea la letra de la respuesta correcta y exige distancia mínima entre versiones"
+                             + note)
+    parser.add_argument("--min-order-distance", type=int, default=None,
+                        help="con --balanced: posiciones mínimas en que difiere el orden de dos versiones (N/2)")
+    parser.add_argument("--min-key-distance", type=int, default=None,
+                        help="con --balanced: posiciones mínimas en que difieren dos claves de respuestas")
+    parser.add_argument("--questions", type=int, default=None,
+                        help="preguntas por versión, muestreadas del banco (por defecto todas)" + note)
+    parser.add_argument("--stratify", type=parse_fields, default=META_KEYS,
+                        help="con --questions: campos por los que se estratifica (tema,dificultad)")
+    parser.add_argument("--bank-hash", default=None,
+                        help="huella del banco de la tanda (en la hoja de claves, junto a la semilla); al "
+                             "regenerar o calificar se comprueba que el banco sea el mismo")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="quiz_cli", description="Generador de exámenes sin interfaz gráfica.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    gen = sub.add_parser("generate", help="genera versiones barajadas del banco en PDF")
+    gen.add_argument("--bank", default=QUESTIONS_FILE, help="archivo JSON con las preguntas")
+    gen.add_argument("--versions", type=int, default=1, help="número de versiones a generar")
+    gen.add_argument("--seed", type=int, default=None,
+                     help="semilla maestra; con ella cualquier versión se puede regenerar por separado")
+    gen.add_argument("--only", type=parse_numbers, default=None,
+                     help="regenera solo estas versiones (p. ej. 137 o 3,7,12); requiere --seed")
+    add_version_options(gen)
+    gen.add_argument("--out", required=True,
+                     help="archivo .pdf de salida o carpeta (allí se escribe versiones.pdf)")
+    gen.add_argument("--title", default="Examen - Múltiples versiones", help="título del PDF")
+    gen.add_argument("--workers", type=int, default=1,
+                     help="procesos para renderizar (0 = todos los núcleos; requiere pypdf)")
+    gen.add_argument("--split", action="store_true",
+                     help="un PDF por versión (version_001.pdf, ...) más keys.pdf dentro de --out")
+    gen.add_argument("--profile", choices=MODES, default=None,
+                     help="mide cada etapa y deja el perfil junto al PDF (también con QUIZ_PROFILE=json|cprofile)")
+    gen.set_defaults(func=cmd_generate)
+
+    grade = sub.add_parser("grade", help="califica un CSV de hojas de respuestas contra las claves de las versiones")
+    grade.add_argument("--bank", default=QUESTIONS_FILE, help="archivo JSON con las preguntas de la tanda")
+    grade.add_argument("--seed", type=int, required=True, help="semilla maestra de la tanda (en la hoja de claves)")
+    grade.add_argument("--responses", required=True,
+                       help="CSV con columnas estudiante, version y respuestas (o p1, p2, ...)")
+    add_version_options(grade, "de la tanda original")
+    grade.add_argument("--out", required=True, help="carpeta donde se escriben notas.csv y preguntas.csv")
+    grade.set_defaults(func=cmd_grade)
+
+    dedup = sub.add_parser("dedup", help="busca preguntas duplicadas o casi duplicadas en el banco")
+    dedup.add_argument("--bank", default=QUESTIONS_FILE, help="archivo JSON con las preguntas")
+    dedup.add_argument("--threshold", type=parse_threshold, default=0.7,
+                       help="similitud (Jaccard) mínima para considerar dos preguntas casi iguales")
+    dedup.add_argument("--exact-only", action="store_true", help="solo busca duplicados exactos")
+    dedup.add_argument("--report", default=None, help="escribe el informe en este archivo en vez de la consola")
+    dedup.add_argument("--merge", action="store_true",
+                       help="elimina los duplicados exactos (se conserva la primera aparición)")
+    dedup.add_argument("--include-similar", action="store_true",
+                       help="con --merge: elimina también las preguntas similares")
+    dedup.add_argument("--out", default=None, help="con --merge: archivo de salida (por defecto --bank)")
+    dedup.set_defaults(func=cmd_dedup)
+
+    merge = sub.add_parser("merge", help="fusiona bancos JSON, JSONL o CSV en un solo JSON")
+    merge.add_argument("inputs", nargs="+", help="archivos a fusionar (.json, .jsonl/.ndjson o .csv)")
+    merge.add_argument("--out", required=True, help="archivo JSON de salida")
+    merge.add_argument("--keep-duplicates", action="store_true",
+                       help="conserva las preguntas idénticas en vez de omitirlas")
+    merge.add_argument("--quiet", action="store_true", help="no muestra el progreso")
+    merge.set_defaults(func=cmd_merge)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == "generate" and args.versions < 1:
+        print("ERROR: --versions debe ser al menos 1", file=sys.stderr)
+        return 2
+    if args.command == "generate" and args.only and args.seed is None:
+        print("ERROR: --only necesita la --seed con la que se generaron las versiones", file=sys.stderr)
+        return 2
+    try:
+        args.func(args)
+    except Exception as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,279 @@
+"""
+Detección de preguntas duplicadas y casi duplicadas en el banco.
+
+- Exactas: misma pregunta y mismas opciones (en cualquier orden) tras
+  normalizar mayúsculas, tildes y espacios; se agrupan por un hash.
+- Similares: MinHash sobre shingles (pares de palabras de la pregunta y
+  cada opción) y LSH por bandas. Solo se
+  comparan las preguntas que comparten alguna banda, así que el costo es
+  casi lineal; cada par candidato se verifica con el Jaccard exacto.
+"""
+import hashlib
+import random
+import re
+import zlib
+from itertools import chain
+from quiz_search import fold
+
+# NumPy se importa en la primera búsqueda de similares (ver load_numpy) y no
+# al importar el módulo, para no alargar el arranque de la GUI y la CLI
+np = None
+_numpy_tried = False
+
+# MinHash de HASHES funciones agrupadas en bandas de ROWS filas (10 bandas
+# de 3: un par con Jaccard 0.7 es candidato con probabilidad ~0.98, uno con
+# 0.3 ~0.24)
+HASHES = 30
+ROWS = 3
+# cada función es el crc32 del shingle con XOR de una máscara fija
+_MASKS = [random.Random(f"minhash:{k}").getrandbits(32) for k in range(HASHES)]
+_WORD = re.compile(r"\w+")
+# preguntas por lote al calcular firmas con NumPy
+_CHUNK = 4096
+
+
+class DuplicateGroup:
+    """Preguntas (posiciones en el banco) que se consideran la misma."""
+    __slots__ = ("kind", "indices", "similarity", "conflict")
+
+    def __init__(self, kind, indices, similarity=1.0, conflict=False):
+        self.kind = kind                # "exacto" o "similar"
+        self.indices = indices          # posiciones ordenadas; se conserva la primera
+        self.similarity = similarity    # Jaccard mínimo verificado dentro del grupo
+        self.conflict = conflict        # respuestas distintas: revisar a mano
+
+
+def normalize(q):
+    """(palabras de la pregunta, opciones normalizadas) sin mayúsculas, tildes ni puntuación."""
+    parts = fold("\x1e".join([q["pregunta"], *q["opciones"]])).split("\x1e")
+    return _WORD.findall(parts[0]), [" ".join(_WORD.findall(o)) for o in parts[1:]]
+
+
+def answer_key(q):
+    """Respuesta normalizada como las opciones: "París" y "paris" son la misma."""
+    return " ".join(_WORD.findall(fold(q.get("respuesta") or "")))
+
+
+def _conflict(questions, indices):
+    return len({answer_key(questions[i]) for i in indices}) > 1
+
+
+def exact_key(words, options):
+    """Hash de la pregunta y sus opciones ordenadas (ver normalize)."""
+    text = "\x1f".join([" ".join(words), *sorted(options)])
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+
+def shingles(words, options):
+    """Pares de palabras consecutivas de la pregunta más cada opción completa."""
+    found = {f"{a} {b}" for a, b in zip(words, words[1:])} if len(words) > 2 else set(words)
+    found.update("\x1f" + o for o in options)
+    return found
+
+
+def shingle_hashes(found):
+    """crc32 de cada shingle ([0] si no hay ninguno, para que la firma exista)."""
+    return [zlib.crc32(s.encode("utf-8")) for s in found] or [0]
+
+
+def signature(hashes):
+    """MinHash: el mínimo de cada función de hash sobre los shingles."""
+    return [min(map(mask.__xor__, hashes)) for mask in _MASKS]
+
+
+def load_numpy():
+    """Importa NumPy la primera vez; None si no está (las firmas se calculan en Python puro, más lento)."""
+    global np, _numpy_tried
+    if not _numpy_tried:
+        _numpy_tried = True
+        try:
+            import numpy
+            np = numpy
+        except ImportError:
+            pass
+    return np
+
+
+def _signature_matrix(hash_lists):
+    """Firmas como matriz (preguntas x HASHES) de NumPy, calculadas por lotes."""
+    masks = np.array(_MASKS, dtype=np.uint32)
+    parts = []
+    for start in range(0, len(hash_lists), _CHUNK):
+        chunk = hash_lists[start:start + _CHUNK]
+        lengths = np.fromiter(map(len, chunk), dtype=np.int64, count=len(chunk))
+        flat = np.fromiter(chain.from_iterable(chunk), dtype=np.uint32, count=int(lengths.sum()))
+        offsets = np.zeros(len(chunk), dtype=np.int64)
+        np.cumsum(lengths[:-1], out=offsets[1:])
+        parts.append(np.minimum.reduceat(flat[:, None] ^ masks, offsets, axis=0))
+    return np.concatenate(parts) if parts else np.zeros((0, HASHES), dtype=np.uint32)
+
+
+def candidate_buckets(hash_lists):
+    """
+    Grupos de índices (de hash_lists, en orden creciente) cuyas firmas
+    coinciden en alguna banda de ROWS funciones: los pares candidatos.
+    """
+    bands = range(0, HASHES - ROWS + 1, ROWS)
+    if load_numpy() is None:
+        buckets = {}
+        for i, hashes in enumerate(hash_lists):
+            sig = signature(hashes)
+            for band in bands:
+                buckets.setdefault((band, *sig[band:band + ROWS]), []).append(i)
+        return [members for members in buckets.values() if len(members) > 1]
+
+    sigs = _signature_matrix(hash_lists).astype(np.uint64)
+    result = []
+    for band in bands:
+        # las ROWS funciones de la banda se combinan en una clave de 64 bits; una
+        # colisión solo añade un candidato que luego descarta el Jaccard exacto
+        key = sigs[:, band]
+        for col in range(band + 1, band + ROWS):
+            key = key * np.uint64(0x9E3779B97F4A7C15) ^ sigs[:, col]
+        order = np.argsort(key, kind="stable")
+        ordered = key[order]
+        starts = np.flatnonzero(np.r_[True, ordered[1:] != ordered[:-1]])
+        ends = np.r_[starts[1:], len(ordered)]
+        for start, end in zip(starts[ends - starts > 1].tolist(), ends[ends - starts > 1].tolist()):
+            result.append(order[start:end].tolist())
+    return result
+
+
+def jaccard(a, b):
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class _UnionFind:
+    def __init__(self):
+        self.parent = {}
+
+    def find(self, x):
+        parent = self.parent
+        root = x
+        while parent.get(root, root) != root:
+            root = parent[root]
+        while x != root:
+            parent[x], x = root, parent.get(x, x)
+        return root
+
+    def union(self, a, b):
+        ra, rb = self.find(a), self.find(b)
+        root = min(ra, rb)
+        self.parent[ra] = self.parent[rb] = root
+
+
+def find_duplicates(questions, threshold=0.7, similar=True, progress=None):
+    """
+    Devuelve los grupos de duplicados del banco: primero los exactos y
+    luego (con similar) los que superan el umbral de Jaccard entre
+    shingles. En cada grupo la primera posición es la que se conserva al
+    fusionar. progress(hechas, total), si se da, se llama cada 1000
+    preguntas.
+    """
+    groups = []
+    by_key = {}
+    normalized = {}
+    total = len(questions)
+    for i, q in enumerate(questions):
+        words, options = normalize(q)
+        key = exact_key(words, options)
+        same = by_key.get(key)
+        if same is None:
+            by_key[key] = [i]
+            if similar:
+                normalized[i] = (words, options)
+        else:
+            same.append(i)
+        if progress is not None and i % 1000 == 0:
+            progress(i, 2 * total if similar else total)
+    for indices in by_key.values():
+        if len(indices) > 1:
+            groups.append(DuplicateGroup("exacto", indices, conflict=_conflict(questions, indices)))
+    if not similar:
+        return groups
+
+    # solo se buscan similares entre representantes (primera de cada grupo exacto)
+    sets = {i: shingles(*norm) for i, norm in normalized.items()}
+    del normalized
+    keys = list(sets)
+    buckets = candidate_buckets([shingle_hashes(found) for found in sets.values()])
+    if progress is not None:
+        progress(2 * total - 1, 2 * total)
+
+    uf = _UnionFind()
+    checked = {}
+    for members in buckets:
+        members = [keys[k] for k in members]
+        # cada miembro se compara con el primero y con el anterior del cubo:
+        # lineal en el tamaño del cubo, y la unión transitiva junta el resto
+        for k in range(1, len(members)):
+            for a in {members[0], members[k - 1]}:
+                b = members[k]
+                pair = (a, b)
+                if pair in checked:
+                    continue
+                sim = checked[pair] = jaccard(sets[a], sets[b])
+                if sim >= threshold:
+                    uf.union(a, b)
+
+    clusters = {}
+    for i in uf.parent:
+        clusters.setdefault(uf.find(i), []).append(i)
+    lowest = {}
+    for (a, _), sim in checked.items():
+        if sim >= threshold:
+            root = uf.find(a)
+            lowest[root] = min(lowest.get(root, 1.0), sim)
+    for root, members in clusters.items():
+        members.sort()
+        groups.append(DuplicateGroup("similar", members, lowest[root], conflict=_conflict(questions, members)))
+    groups.sort(key=lambda g: g.indices[0])
+    return groups
+
+
+def format_report(groups, questions, limit=None):
+    """Informe de texto (en español) de los grupos encontrados."""
+    exact = sum(1 for g in groups if g.kind == "exacto")
+    conflicts = sum(1 for g in groups if g.conflict)
+    # los grupos con respuestas distintas nunca se fusionan (ver merge_duplicates)
+    extra = sum(len(g.indices) - 1 for g in groups if not g.conflict)
+    lines = [f"{exact} grupos de duplicados exactos, {len(groups) - exact} grupos de preguntas similares",
+             f"{extra} preguntas sobrarían al fusionar"
+             + (f" ({conflicts} grupos con respuestas distintas no se cuentan)" if conflicts else ""), ""]
+    for g in groups[:limit]:
+        title = "Exactas" if g.kind == "exacto" else f"Similares ({g.similarity:.0%})"
+        if g.conflict:
+            title += " — RESPUESTAS DISTINTAS, revisar a mano"
+        lines.append(f"{title}: " + ", ".join(str(i + 1) for i in g.indices))
+        for i in g.indices:
+            lines.append(f"    {i + 1}. {questions[i]['pregunta'][:90]}")
+    if limit is not None and len(groups) > limit:
+        lines.append(f"... y {len(groups) - limit} grupos más")
+    return "\n".join(lines)
+
+
+def merge_duplicates(questions, groups, include_similar=False):
+    """
+    Devuelve (banco_fusionado, posiciones_eliminadas): de cada grupo se
+    conserva la primera pregunta, completando su tema y dificultad con los
+    de las demás si le faltan. Los grupos con respuestas distintas y, salvo
+    include_similar, los similares no se tocan.
+    """
+    drop = set()
+    replace = {}
+    for g in groups:
+        if g.conflict or (g.kind == "similar" and not include_similar):
+            continue
+        keep = g.indices[0]
+        merged = questions[keep]
+        for i in g.indices[1:]:
+            extra = {k: v for k, v in questions[i].items() if k in ("tema", "dificultad") and k not in merged}
+            if extra:
+                merged = dict(merged, **extra)
+            drop.add(i)
+        if merged is not questions[keep]:
+            replace[keep] = merged
+    merged_bank = [replace.get(i, q) for i, q in enumerate(questions) if i not in drop]
+    return merged_bank, sorted(drop)
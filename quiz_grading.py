@@ -0,0 +1,242 @@
+"""
+Calificación de hojas de respuestas contra las claves de las versiones.
+
+Las claves de todas las versiones se guardan como matrices de NumPy (una
+fila por versión) y todas las hojas se califican a la vez: la clave de
+cada hoja se obtiene indexando por su fila de versión y las estadísticas
+por pregunta se acumulan con bincount sobre el id de la pregunta en el
+banco, así que dos versiones que la muestran en posiciones o con letras
+distintas cuentan para la misma pregunta.
+
+CSV de respuestas: columnas estudiante/student, version y
+respuestas/answers con las letras seguidas ("ABDC-A...", "-" o espacio
+para las preguntas en blanco), o una columna por pregunta (p1, p2, ... o
+q1, q2, ...) con una letra cada una.
+"""
+import csv
+import re
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# letras máximas por pregunta que se reconocen en las hojas (A..Z)
+_LETTERS = 26
+_QUESTION_COLUMN = re.compile(r"^[pq]\d+$")
+
+
+def _require_numpy():
+    if np is None:
+        raise RuntimeError("La calificación necesita NumPy (pip install numpy)")
+
+
+class AnswerKeys:
+    """
+    Claves de un conjunto de versiones que comparten banco, una fila por
+    versión en orden de número:
+
+    - numbers: números de versión (V,)
+    - keys: letra correcta por posición (V, N); -1 si la respuesta no está
+      entre las opciones y la pregunta no puntúa
+    - qids: id de la pregunta del banco en cada posición (V, N)
+    - options: opción original mostrada con cada letra (V, N, L); -1 si la
+      pregunta tiene menos de L opciones
+    """
+
+    def __init__(self, versions):
+        _require_numpy()
+        if not versions:
+            raise ValueError("No hay versiones con las que calificar")
+        versions = sorted(versions, key=lambda v: v.number)
+        self.bank = versions[0].bank
+        size = len(versions[0])
+        if any(v.bank is not self.bank or len(v) != size for v in versions):
+            raise ValueError("Las versiones deben compartir banco y número de preguntas")
+        starts = np.frombuffer(self.bank.opt_start, dtype=np.uint32)
+        width = int(np.diff(starts).max()) if size else 0
+        self.numbers = np.array([v.number for v in versions], dtype=np.int64)
+        self.keys = np.array([np.frombuffer(v.keys, dtype=np.int8) for v in versions], dtype=np.int8)
+        self.qids = np.array([np.frombuffer(v.order, dtype=np.uint32) for v in versions], dtype=np.int64)
+        self.options = np.full((len(versions), size, width), -1, dtype=np.int8)
+        for row, v in enumerate(versions):
+            shown = self.options[row]
+            for pos in range(size):
+                perm = v.option_order(pos)
+                shown[pos, :len(perm)] = perm
+
+    def __len__(self):
+        return len(self.numbers)
+
+    def rows_of(self, versions):
+        """Fila de la clave de cada número de versión; ValueError si alguno no está."""
+        rows = np.searchsorted(self.numbers, versions).clip(0, len(self.numbers) - 1)
+        unknown = self.numbers[rows] != versions
+        if unknown.any():
+            missing = sorted(set(versions[unknown].tolist()))
+            shown = ", ".join(map(str, missing[:10])) + (" ..." if len(missing) > 10 else "")
+            raise ValueError(f"{int(unknown.sum())} hoja(s) con versiones sin clave: {shown}")
+        return rows
+
+
+def _letter_table():
+    table = np.full(256, -1, dtype=np.int8)
+    table[65:65 + _LETTERS] = np.arange(_LETTERS)
+    table[97:97 + _LETTERS] = np.arange(_LETTERS)
+    return table
+
+
+def read_responses(path):
+    """
+    Lee el CSV de respuestas (ver el docstring del módulo). Devuelve
+    (estudiantes, versiones, letras): versiones como arreglo de enteros y
+    letras como matriz int8 (hojas x preguntas) con A=0, B=1, ... y -1 en
+    blanco o ilegible.
+    """
+    _require_numpy()
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f)
+        header = [h.strip().lower() for h in next(reader, [])]
+        column = {name: k for k, name in enumerate(header)}
+        student = column.get("estudiante", column.get("student"))
+        version = column.get("version", column.get("versión"))
+        answers = column.get("respuestas", column.get("answers"))
+        per_question = [k for k, name in enumerate(header) if _QUESTION_COLUMN.match(name)]
+        if student is None or version is None or (answers is None and not per_question):
+            raise ValueError("el CSV necesita las columnas estudiante, version y respuestas "
+                             "(o una columna por pregunta: p1, p2, ...)")
+        students = []
+        numbers = []
+        sheets = []
+        for n, row in enumerate(reader, start=2):
+            if not any(row):
+                continue
+            try:
+                number = int(row[version])
+            except (ValueError, IndexError):
+                number = 0
+            if number < 1:
+                raise ValueError(f"fila {n}: número de versión inválido")
+            numbers.append(number)
+            students.append(row[student].strip() if student < len(row) else "")
+            if answers is not None:
+                sheets.append(row[answers].strip() if answers < len(row) else "")
+            else:
+                sheets.append("".join((row[k].strip()[:1] or " ") if k < len(row) else " "
+                                      for k in per_question))
+    width = max(map(len, sheets), default=0)
+    raw = "".join(s.ljust(width) for s in sheets).encode("ascii", "replace")
+    letters = _letter_table()[np.frombuffer(raw, dtype=np.uint8)].reshape(len(sheets), width)
+    return students, np.array(numbers, dtype=np.int64), letters
+
+
+class GradeReport:
+    """
+    Resultado de grade(). Por hoja: scores (aciertos) y max_scores
+    (preguntas que puntúan en su versión). Por pregunta del banco (id =
+    posición en el banco): seen (hojas en que apareció), difficulty
+    (proporción de aciertos), discrimination (correlación punto-biserial
+    entre acertarla y el puntaje en el resto del examen), choices
+    (hojas que marcaron cada opción original, matriz preguntas x L) y
+    blanks. Las preguntas que no aparecieron en ninguna hoja tienen NaN.
+    """
+
+    def __init__(self, keys, students, versions, scores, max_scores, seen, difficulty,
+                 discrimination, choices, blanks):
+        self.keys = keys
+        self.students = students
+        self.versions = versions
+        self.scores = scores
+        self.max_scores = max_scores
+        self.seen = seen
+        self.difficulty = difficulty
+        self.discrimination = discrimination
+        self.choices = choices
+        self.blanks = blanks
+
+    def summary(self):
+        if not len(self.scores):
+            return "No hay hojas que calificar."
+        percent = self.scores / np.maximum(self.max_scores, 1) * 100
+        return (f"{len(self.scores)} hojas calificadas: promedio {percent.mean():.1f}%, "
+                f"mediana {np.median(percent):.1f}%, mínimo {percent.min():.1f}%, máximo {percent.max():.1f}%")
+
+    def write_scores(self, path):
+        """CSV con una fila por hoja: estudiante, versión, aciertos, total y porcentaje."""
+        percent = np.round(self.scores / np.maximum(self.max_scores, 1) * 100, 1)
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["estudiante", "version", "aciertos", "total", "porcentaje"])
+            writer.writerows(zip(self.students, self.versions.tolist(), self.scores.tolist(),
+                                 self.max_scores.tolist(), percent.tolist()))
+
+    def write_items(self, path):
+        """
+        CSV con una fila por pregunta aparecida: dificultad, discriminación,
+        blancos y cuántas hojas marcaron cada opción (en el orden del banco;
+        la correcta se indica en la columna correcta).
+        """
+        bank = self.keys.bank
+        width = self.choices.shape[1]
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["pregunta", "texto", "hojas", "dificultad", "discriminacion", "en_blanco",
+                             "correcta", *(f"opcion_{chr(65 + k)}" for k in range(width))])
+            for qid in np.flatnonzero(self.seen).tolist():
+                count = bank.option_count(qid)
+                answer = bank.answers[qid]
+                discrimination = self.discrimination[qid]
+                writer.writerow([qid + 1, bank.texts[qid][:80], int(self.seen[qid]),
+                                 round(float(self.difficulty[qid]), 3),
+                                 "" if np.isnan(discrimination) else round(float(discrimination), 3),
+                                 int(self.blanks[qid]), chr(65 + answer) if answer >= 0 else "N/A",
+                                 *self.choices[qid, :count].tolist(), *[""] * (width - count)])
+
+
+def grade(keys, students, versions, letters):
+    """
+    Califica todas las hojas a la vez (ver read_responses para el formato
+    de las entradas) contra keys (AnswerKeys). Las hojas con más letras
+    que preguntas se recortan y las que tienen menos se completan en
+    blanco. Devuelve un GradeReport.
+    """
+    _require_numpy()
+    rows = keys.rows_of(versions)
+    size = keys.keys.shape[1]
+    if letters.shape[1] < size:
+        letters = np.pad(letters, ((0, 0), (0, size - letters.shape[1])), constant_values=-1)
+    letters = letters[:, :size]
+
+    key = keys.keys[rows]
+    correct = (letters == key) & (key >= 0)
+    scores = correct.sum(axis=1)
+    max_scores = (keys.keys >= 0).sum(axis=1)[rows]
+
+    # estadísticas por pregunta del banco: cada celda (hoja, posición) suma
+    # en el id de la pregunta que la versión de esa hoja muestra allí
+    count = len(keys.bank.texts)
+    qids = keys.qids[rows].ravel()
+    hit = correct.ravel().astype(np.float64)
+    rest = (scores[:, None] - correct).ravel().astype(np.float64)
+    seen = np.bincount(qids, minlength=count)
+    sum_x = np.bincount(qids, weights=hit, minlength=count)
+    sum_y = np.bincount(qids, weights=rest, minlength=count)
+    sum_xy = np.bincount(qids, weights=hit * rest, minlength=count)
+    sum_yy = np.bincount(qids, weights=rest * rest, minlength=count)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        difficulty = sum_x / seen
+        spread = (seen * sum_x - sum_x * sum_x) * (seen * sum_yy - sum_y * sum_y)
+        discrimination = (seen * sum_xy - sum_x * sum_y) / np.sqrt(spread)
+    discrimination[spread <= 0] = np.nan
+
+    # letra marcada -> opción original según la permutación de la versión
+    width = keys.options.shape[2]
+    marked = letters.clip(0, width - 1)
+    option = keys.options[rows[:, None], np.arange(size)[None, :], marked]
+    option = np.where((letters >= 0) & (letters < width), option, -1).ravel()
+    chosen = option >= 0
+    choices = np.bincount(qids[chosen] * width + option[chosen],
+                          minlength=count * width).reshape(count, width)
+    blanks = seen - choices.sum(axis=1)
+    return GradeReport(keys, students, versions, scores, max_scores, seen, difficulty,
+                       discrimination, choices, blanks)
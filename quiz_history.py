@@ -0,0 +1,146 @@
+"""
+Historial de deshacer y rehacer del banco en memoria.
+
+Cada paso es la lista de cambios (op, pregunta anterior, campos) que la
+interfaz registró de una vez con record_changes, con las operaciones del
+diario (ver BankJournal). Las preguntas se comparten con el banco, que
+nunca las muta en sitio, así que un paso ocupa memoria proporcional a lo
+que cambió (una pregunta en add/edit/delete, una permutación en las
+mezclas, guardada como arreglo) y no una copia del banco. Deshacer
+aplica las operaciones inversas en orden contrario; rehacer vuelve a
+aplicar las originales.
+"""
+from array import array
+
+from quiz_bank import apply_ops
+
+LABELS = {"add": "añadir", "insert": "restaurar", "edit": "editar", "delete": "eliminar",
+          "reorder": "mezclar preguntas", "options": "mezclar opciones"}
+
+
+def describe(step):
+    """Descripción breve de un paso para la barra de estado ("editar, eliminar")."""
+    labels = []
+    for op, _, _ in step:
+        if LABELS[op] not in labels:
+            labels.append(LABELS[op])
+    return ", ".join(labels)
+
+
+def invert_order(order):
+    inverse = [0] * len(order)
+    for j, i in enumerate(order):
+        inverse[i] = j
+    return inverse
+
+
+def _compact(change):
+    """
+    Las permutaciones de reorder y options se guardan como arreglos (4 y 2
+    bytes por elemento) en lugar de listas de ints; las de options, todas
+    seguidas, porque su largo es el número de opciones de cada pregunta.
+    """
+    op, old, fields = change
+    if op == "reorder":
+        return op, old, {"order": array('I', fields["order"])}
+    if op == "options":
+        return op, old, {"perms": array('H', [k for perm in fields["perms"] for k in perm])}
+    return change
+
+
+def _expand(questions, change):
+    """Inversa de _compact; questions está en un estado con el mismo número de opciones por pregunta."""
+    op, old, fields = change
+    if op == "reorder":
+        return op, old, {"order": fields["order"].tolist()}
+    if op == "options":
+        flat = fields["perms"]
+        perms = []
+        start = 0
+        for q in questions:
+            end = start + len(q["opciones"])
+            perms.append(flat[start:end].tolist())
+            start = end
+        return op, old, {"perms": perms}
+    return change
+
+
+def apply_change(questions, op, fields):
+    """Como apply_ops de quiz_bank para un cambio, pero options crea dicts nuevos en lugar de mutarlos."""
+    if op == "options":
+        for i, (q, perm) in enumerate(zip(questions, fields["perms"])):
+            questions[i] = dict(q, opciones=[q["opciones"][k] for k in perm])
+    else:
+        apply_ops(questions, [dict(op=op, **fields)])
+
+
+def inverse(questions, op, old, fields):
+    """
+    Cambios que deshacen (op, old, campos) sobre questions en el estado
+    justo posterior a ese cambio.
+    """
+    if op == "add":
+        last = len(questions) - 1
+        return [("delete", questions[last], {"i": last})]
+    if op == "edit":
+        i = fields["i"]
+        return [("edit", questions[i], {"i": i, "q": old})]
+    if op == "insert":
+        i = fields["i"]
+        return [("delete", questions[i], {"i": i})]
+    if op == "delete":
+        return [("insert", None, {"i": fields["i"], "q": old})]
+    if op == "reorder":
+        return [("reorder", None, {"order": invert_order(fields["order"])})]
+    if op == "options":
+        return [("options", None, {"perms": [invert_order(perm) for perm in fields["perms"]]})]
+    raise ValueError(f"operación desconocida: {op}")
+
+
+class History:
+    """Pilas de pasos para deshacer y rehacer, sin límite."""
+
+    def __init__(self):
+        self.done = []
+        self.undone = []
+
+    def record(self, changes):
+        """Guarda un paso nuevo; lo deshecho que quedaba por rehacer se descarta."""
+        if changes:
+            self.done.append([_compact(change) for change in changes])
+            self.undone.clear()
+
+    def clear(self):
+        self.done.clear()
+        self.undone.clear()
+
+    def undo(self, questions):
+        """
+        Deshace el último paso sobre questions. Devuelve (paso, cambios
+        aplicados), para registrar los cambios en el diario y el índice, o
+        None si no hay nada que deshacer.
+        """
+        if not self.done:
+            return None
+        step = self.done.pop()
+        applied = []
+        for change in reversed(step):
+            op, old, fields = _expand(questions, change)
+            for back in inverse(questions, op, old, fields):
+                apply_change(questions, back[0], back[2])
+                applied.append(back)
+        self.undone.append(step)
+        return step, applied
+
+    def redo(self, questions):
+        """Vuelve a aplicar el último paso deshecho; devuelve (paso, cambios aplicados) o None."""
+        if not self.undone:
+            return None
+        step = self.undone.pop()
+        applied = []
+        for change in step:
+            change = _expand(questions, change)
+            apply_change(questions, change[0], change[2])
+            applied.append(change)
+        self.done.append(step)
+        return step, applied
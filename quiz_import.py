@@ -0,0 +1,255 @@
+"""
+Importación de bancos en JSON, JSONL y CSV, y fusión de varios archivos.
+
+Los archivos se leen como flujo (por bloques o por líneas) y se validan en
+lotes, así que nunca hay en memoria más que el banco resultante y un
+bloque del archivo: sirve para exportaciones enormes de otros sistemas.
+
+CSV: una fila por pregunta con columnas pregunta/question,
+respuesta/answer y, opcionales, tema/topic y dificultad/difficulty. Las
+opciones van en una columna opciones/options separadas por "|" o en varias
+columnas cuyo nombre empieza por "opcion"/"option" (opcion1, option_a...).
+La respuesta puede ser el texto de la opción, su letra (A, B, ...) o su
+número (1, 2, ...).
+"""
+import codecs
+import csv
+import hashlib
+import json
+import os
+from quiz_bank import BankValidationError, parse_json, validate_questions
+
+# bytes leídos por bloque en los JSON y preguntas validadas por lote
+_BLOCK = 1 << 20
+_BATCH = 1000
+# cada cuántos elementos se informa el progreso
+PROGRESS_EVERY = 2000
+
+FORMATS = (".json", ".jsonl", ".ndjson", ".csv")
+
+
+class _Counter:
+    """Envuelve un archivo binario y cuenta los bytes leídos (para el progreso)."""
+
+    def __init__(self, f):
+        self.f = f
+        self.done = 0
+
+    def read(self, size):
+        data = self.f.read(size)
+        self.done += len(data)
+        return data
+
+    def __iter__(self):
+        for line in self.f:
+            self.done += len(line)
+            yield line
+
+
+def iter_json(f):
+    """Elementos de un arreglo JSON, decodificados uno a uno."""
+    decoder = json.JSONDecoder()
+    text = codecs.getincrementaldecoder("utf-8-sig")()
+    buf = ""
+    pos = 0
+    started = False
+    eof = False
+    while True:
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n,":
+                pos += 1
+            if pos == len(buf):
+                break
+            if not started:
+                if buf[pos] != "[":
+                    raise ValueError("El JSON debe contener una lista de preguntas")
+                started = True
+                pos += 1
+                continue
+            if buf[pos] == "]":
+                return
+            try:
+                item, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError as e:
+                if eof:
+                    raise ValueError(f"JSON inválido: {e}")
+                break  # el elemento sigue en el próximo bloque
+            if end == len(buf) and not eof:
+                break  # un número o literal podría continuar en el próximo bloque
+            yield item
+            pos = end
+        if eof:
+            if not started:
+                raise ValueError("El JSON debe contener una lista de preguntas")
+            raise ValueError("JSON inválido: falta el ']' final")
+        block = f.read(_BLOCK)
+        eof = not block
+        buf = buf[pos:] + text.decode(block, final=eof)
+        pos = 0
+
+
+def iter_jsonl(f):
+    """Un objeto JSON por línea; las líneas vacías se ignoran."""
+    for n, line in enumerate(f, start=1):
+        if line.strip():
+            try:
+                yield parse_json(line)
+            except ValueError as e:
+                raise ValueError(f"línea {n}: JSON inválido: {e}")
+
+
+def _letter_answer(answer, options):
+    """La respuesta como texto de opción si viene como letra (A, B, ...) o número (1, 2, ...)."""
+    if answer in options or not answer:
+        return answer
+    token = answer.strip().rstrip(").").strip()
+    if len(token) == 1 and token.isalpha():
+        k = ord(token.upper()) - ord("A")
+    elif token.isdigit():
+        k = int(token) - 1
+    else:
+        return answer
+    return options[k] if 0 <= k < len(options) else answer
+
+
+def iter_csv(f):
+    """Filas del CSV como dicts con las claves del banco (ver el docstring del módulo)."""
+    lines = (line.decode("utf-8-sig") for line in f)
+    reader = csv.reader(lines)
+    header = next(reader, None)
+    if header is None:
+        return
+    names = [h.strip().lower() for h in header]
+    option_cols = [k for k, name in enumerate(names) if name.startswith(("opcion", "option"))
+                   and name not in ("opciones", "options")]
+    columns = {}
+    for k, name in enumerate(names):
+        columns.setdefault({"question": "pregunta", "options": "opciones", "answer": "respuesta",
+                            "topic": "tema", "difficulty": "dificultad"}.get(name, name), k)
+    if "pregunta" not in columns:
+        raise ValueError("el CSV necesita una columna 'pregunta' (o 'question')")
+    if "opciones" not in columns and not option_cols:
+        raise ValueError("el CSV necesita una columna 'opciones' o columnas opcion1, opcion2, ...")
+
+    def cell(row, key):
+        k = columns.get(key)
+        return row[k].strip() if k is not None and k < len(row) else ""
+
+    for row in reader:
+        if not any(row):
+            continue
+        if option_cols:
+            options = [row[k].strip() for k in option_cols if k < len(row) and row[k].strip()]
+        else:
+            options = [o.strip() for o in cell(row, "opciones").split("|") if o.strip()]
+        q = {"pregunta": cell(row, "pregunta"), "opciones": options,
+             "respuesta": _letter_answer(cell(row, "respuesta"), options)}
+        tema = cell(row, "tema")
+        dificultad = cell(row, "dificultad")
+        if tema:
+            q["tema"] = tema
+        if dificultad:
+            q["dificultad"] = int(dificultad) if dificultad.isdigit() else dificultad
+        yield q
+
+
+def _reader(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext in (".jsonl", ".ndjson"):
+        return iter_jsonl
+    if ext == ".csv":
+        return iter_csv
+    return iter_json
+
+
+def iter_questions(path, progress=None):
+    """
+    Preguntas normalizadas y validadas del archivo, leídas como flujo; el
+    formato se elige por la extensión (.jsonl/.ndjson, .csv o JSON).
+    progress(bytes_leídos, tamaño) se llama cada PROGRESS_EVERY preguntas.
+    Los elementos inválidos se reúnen y se lanzan juntos como
+    BankValidationError al final.
+    """
+    size = os.path.getsize(path)
+    errors = []
+    with open(path, "rb") as raw:
+        f = _Counter(raw)
+        batch = []
+        start = 0
+        for item in _reader(path)(f):
+            batch.append(item)
+            if len(batch) == _BATCH:
+                yield from _validated(batch, start, errors)
+                start += len(batch)
+                batch = []
+                if progress is not None and start % PROGRESS_EVERY == 0:
+                    progress(f.done, size)
+        yield from _validated(batch, start, errors)
+        if progress is not None:
+            progress(size, size)
+    if errors:
+        raise BankValidationError(errors)
+
+
+def _validated(batch, start, errors):
+    normalized, batch_errors = validate_questions(batch)
+    errors.extend((start + i, msg) for i, msg in batch_errors)
+    return normalized
+
+
+def _verbatim_key(q):
+    text = "\x1f".join([q["pregunta"], *sorted(q["opciones"])])
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+
+def merge_banks(paths, skip_duplicates=True, progress=None, existing=()):
+    """
+    Fusiona varios archivos de preguntas en un solo banco (lista de dicts),
+    leyendo cada uno como flujo. Con skip_duplicates se omiten las
+    preguntas con el mismo texto y las mismas opciones (en cualquier orden)
+    que otra ya leída; las que solo difieren en mayúsculas, tildes o
+    redacción las encuentra después quiz_dedup. Los textos de opción, tema
+    y dificultad repetidos se comparten entre preguntas para no duplicarlos
+    en memoria. existing son preguntas que ya están en el banco de destino:
+    las copias de ellas también se omiten.
+
+    progress(bytes_leídos, bytes_totales) cubre todos los archivos. Los
+    errores de validación de todos ellos se lanzan juntos al final como
+    BankValidationError, con el nombre del archivo en cada mensaje.
+    Devuelve (preguntas, omitidas).
+    """
+    sizes = [os.path.getsize(p) for p in paths]
+    total = sum(sizes)
+    merged = []
+    seen = set(map(_verbatim_key, existing)) if skip_duplicates else set()
+    shared = {}
+    skipped = 0
+    errors = []
+    before = 0
+    for path, size in zip(paths, sizes):
+        report = None
+        if progress is not None:
+            report = lambda done, _, before=before: progress(before + done, total)  # noqa: E731
+        try:
+            for q in iter_questions(path, report):
+                if skip_duplicates:
+                    key = _verbatim_key(q)
+                    if key in seen:
+                        skipped += 1
+                        continue
+                    seen.add(key)
+                q["opciones"] = [shared.setdefault(o, o) for o in q["opciones"]]
+                q["respuesta"] = shared.setdefault(q["respuesta"], q["respuesta"])
+                for key in ("tema", "dificultad"):
+                    if key in q:
+                        q[key] = shared.setdefault(q[key], q[key])
+                merged.append(q)
+        except BankValidationError as e:
+            name = os.path.basename(path)
+            errors.extend((i, f"{name}: {msg}") for i, msg in e.errors)
+        except ValueError as e:
+            raise ValueError(f"{os.path.basename(path)}: {e}")
+        before += size
+    if errors:
+        raise BankValidationError(errors)
+    return merged, skipped
@@ -0,0 +1,554 @@
+import functools
+import importlib.util
+import itertools
+import os
+import threading
+import quiz_profile
+from quiz_bank import LOGO_FILE
+from quiz_versions import ExamVersion
+
+# este módulo no depende de tkinter; ReportLab se importa dentro de cada
+# función para que solo se cargue cuando de verdad se exporta un PDF
+PARALLEL_PDF_AVAILABLE = importlib.util.find_spec("pypdf") is not None
+
+
+class ExportCancelled(Exception):
+    """La exportación se canceló a petición del usuario."""
+
+
+class ExportProgress:
+    """
+    Estado compartido entre el hilo que exporta y la interfaz: versiones y
+    páginas terminadas y una bandera de cancelación. El renderizado llama a
+    check() en cada página y en cada versión, que lanza ExportCancelled.
+    """
+
+    def __init__(self, versions_total=0):
+        self.versions_total = versions_total
+        self.versions_done = 0
+        self.pages = 0
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def check(self):
+        if self._cancel.is_set():
+            raise ExportCancelled()
+
+    def page_done(self, *args):
+        self.pages += 1
+        self.check()
+
+    def version_done(self, *args):
+        self.versions_done += 1
+        self.check()
+
+
+def page_callback(number_pages=True, progress=None):
+    """Callback onPage de ReportLab: encabezado, numeración y avance."""
+    def on_page(cnv, doc):
+        header_footer(cnv, doc, number_pages=number_pages)
+        if progress is not None:
+            progress.page_done()
+    return on_page
+
+
+_styles_cache = {}
+
+
+def pdf_styles():
+    """
+    Estilos de párrafo compartidos por todas las exportaciones. Se construyen
+    una sola vez por proceso (en la primera exportación) y se reutilizan.
+    """
+    if _styles_cache:
+        return _styles_cache
+
+    from reportlab.lib import colors
+    from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+
+    styles = getSampleStyleSheet()
+    _styles_cache.update({
+        'sample': styles,
+        'question': ParagraphStyle(
+            'QuestionStyle',
+            parent=styles['Normal'],
+            fontName='Helvetica-Bold',
+            fontSize=12,
+            spaceAfter=6,
+            textColor=colors.darkblue
+        ),
+        'option': ParagraphStyle(
+            'OptionStyle',
+            parent=styles['Normal'],
+            fontName='Helvetica',
+            fontSize=11,
+            leftIndent=20
+        ),
+        'answer': ParagraphStyle(
+            'AnswerStyle',
+            parent=styles['Normal'],
+            fontName='Helvetica-Oblique',
+            fontSize=10,
+            textColor=colors.darkred
+        ),
+        'title': ParagraphStyle(
+            'TitleStyle',
+            parent=styles['Title'],
+            alignment=1  # centered
+        ),
+    })
+    return _styles_cache
+
+
+# textos distintos (por estilo) cuyo markup parseado se conserva entre versiones y exportaciones
+PARAGRAPH_CACHE_SIZE = 50000
+# marca (de uso privado en Unicode) que ocupa el lugar del prefijo al parsear
+_PREFIX_MARK = "\ue000"
+
+
+@functools.lru_cache(maxsize=PARAGRAPH_CACHE_SIZE)
+def _parsed_markup(text, style):
+    """
+    (estilo, fragmentos, viñeta) de Paragraph(_PREFIX_MARK + text, style),
+    o None si el primer fragmento no empieza con la marca.
+    """
+    from reportlab.platypus import Paragraph
+
+    template = Paragraph(_PREFIX_MARK + text, style)
+    frags = template.frags
+    if not frags or not getattr(frags[0], "text", "").startswith(_PREFIX_MARK):
+        return None
+    return template.style, frags, template.bulletText
+
+
+def prefixed_paragraph(prefix, text, style):
+    """
+    Equivale a Paragraph(prefix + str(text), style), pero el markup de text se
+    parsea una sola vez por estilo: las versiones repiten el mismo texto
+    con otro número de pregunta o letra de opción, así que solo se clona
+    el primer fragmento para ponerle su prefijo y el resto se comparte
+    (ReportLab no modifica los fragmentos al maquetar).
+    """
+    from reportlab.platypus import Paragraph
+
+    text = str(text)
+    parsed = _parsed_markup(text, style)
+    if parsed is None:
+        return Paragraph(prefix + text, style)
+    parsed_style, frags, bullet = parsed
+    first = frags[0]
+    frags = [first.clone(text=prefix + first.text[len(_PREFIX_MARK):]), *frags[1:]]
+    return Paragraph(prefix + text, parsed_style, bulletText=bullet, frags=frags)
+
+
+HEADER_FORM = "EncabezadoUnivalle"
+HEADER_TEXT = (
+    "UNIVERSIDAD DEL VALLE SEDE YUMBO\n"
+    "TECNOLOGÍA EN DESARROLLO DE SOFTWARE\n"
+    "Matemáticas Discretas II\n"
+    "Código: 750005C - gustavo.neira@correounivalle.edu.co Docente: Gustavo Neira"
+)
+
+_logo_cache = {}
+
+
+def logo_reader(path):
+    """ImageReader del logo, leído y decodificado una sola vez por proceso (None si no existe)."""
+    if path not in _logo_cache:
+        from reportlab.lib.utils import ImageReader
+        try:
+            _logo_cache[path] = ImageReader(path)
+        except Exception:
+            _logo_cache[path] = None
+    return _logo_cache[path]
+
+
+def draw_header(cnv):
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import letter
+
+    width, height = letter
+    profile = quiz_profile.current
+    if profile is not None:
+        profile.count("encabezados dibujados")
+    logo = logo_reader(LOGO_FILE)
+    if logo is not None:
+        cnv.drawImage(logo, 40, height - 90, width=70, height=70, preserveAspectRatio=True, mask='auto')
+        if profile is not None:
+            profile.count("logos dibujados")
+    else:
+        cnv.setFont('Helvetica-Oblique', 8)
+        cnv.drawString(40, height - 40, "[Logo no encontrado]")
+
+    cnv.setFont("Helvetica-Bold", 9)
+    text_y = height - 45
+    for line in HEADER_TEXT.split("\n"):
+        cnv.drawCentredString(width / 2 + 40, text_y, line.strip())
+        text_y -= 12
+
+    cnv.setStrokeColor(colors.black)
+    cnv.setLineWidth(0.8)
+    cnv.line(40, height - 100, width - 40, height - 100)
+
+
+def header_footer(cnv, doc, number_pages=True):
+    # el encabezado (logo, textos y línea) se dibuja una sola vez como form
+    # XObject por documento y cada página solo lo referencia
+    cnv.saveState()
+    if not cnv.hasForm(HEADER_FORM):
+        cnv.beginForm(HEADER_FORM)
+        draw_header(cnv)
+        cnv.endForm()
+    cnv.doForm(HEADER_FORM)
+    if number_pages:
+        draw_page_number(cnv, doc.page)
+    cnv.restoreState()
+
+
+def draw_page_number(cnv, page):
+    from reportlab.lib.pagesizes import letter
+
+    width, _ = letter
+    cnv.setFont("Helvetica", 8)
+    cnv.drawRightString(width - 40, 25, f"Página {page}")
+
+
+def new_doc(filepath, subject=""):
+    from reportlab.lib.pagesizes import letter
+    from reportlab.platypus import SimpleDocTemplate
+
+    return SimpleDocTemplate(
+        filepath,
+        pagesize=letter,
+        rightMargin=40, leftMargin=40,
+        topMargin=110, bottomMargin=40,
+        subject=subject
+    )
+
+
+def seed_subject(versions):
+    """
+    Texto con la semilla maestra de una tanda de versiones ("" si no se
+    conoce) y la huella del banco del que salió. Indica también si la
+    tanda se generó en modo balanceado o con una muestra del banco, que
+    hacen falta para regenerarla.
+    """
+    for entry in versions:
+        if isinstance(entry, ExamVersion) and entry.seed is not None:
+            mode = []
+            if entry.balanced:
+                mode.append("modo balanceado")
+            if entry.sampler is not None:
+                mode.append(entry.sampler.describe())
+            return (f"Semilla maestra: {entry.seed}, huella del banco: {entry.bank.fingerprint()}"
+                    + (f" ({'; '.join(mode)})" if mode else ""))
+    return ""
+
+
+def single_flowables(questions, title, styles):
+    from reportlab.platypus import PageBreak, Paragraph, Spacer
+
+    question_style = styles['question']
+    option_style = styles['option']
+    answer_style = styles['answer']
+
+    yield Paragraph(title, styles['title'])
+    yield Spacer(1, 12)
+
+    for idx, q in enumerate(questions, start=1):
+        yield prefixed_paragraph(f"{idx}. ", q['pregunta'], question_style)
+        for opt_idx, opt in enumerate(q['opciones'], start=1):
+            yield prefixed_paragraph(f"{chr(64+opt_idx)}. ", opt, option_style)
+        yield Spacer(1, 6)
+
+    yield PageBreak()
+
+    yield Paragraph("Claves de Respuestas", styles['sample']['Heading1'])
+    yield Spacer(1, 12)
+    for idx, q in enumerate(questions, start=1):
+        try:
+            pos = q['opciones'].index(q['respuesta'])
+            letter = chr(65 + pos)
+        except Exception:
+            letter = "N/A"
+        yield prefixed_paragraph(f"{idx}. {letter} — ", q['respuesta'], answer_style)
+        yield Spacer(1, 4)
+
+
+def build_doc(doc, flowables, on_page):
+    """
+    doc.build sobre los flowables generados perezosamente. Con un perfil
+    activo (ver quiz_profile) mide por separado la construcción de los
+    flowables, el callback de página y el total de doc.build.
+    """
+    profile = quiz_profile.current
+    if profile is not None:
+        flowables = profile.flowables(flowables)
+        on_page = profile.on_page(on_page)
+        before = _parsed_markup.cache_info()
+        with profile.stage("doc.build"):
+            doc.build(FlowableStream(flowables), onFirstPage=on_page, onLaterPages=on_page)
+        after = _parsed_markup.cache_info()
+        profile.count("markup parseado", after.misses - before.misses)
+        profile.count("markup reutilizado", after.hits - before.hits)
+        return
+    doc.build(FlowableStream(flowables), onFirstPage=on_page, onLaterPages=on_page)
+
+
+def render_single_pdf(questions, filepath, title="Cuestionario", progress=None):
+    doc = new_doc(filepath)
+    build_doc(doc, single_flowables(questions, title, pdf_styles()), page_callback(progress=progress))
+    return doc.page
+
+
+def version_rows(entry):
+    """
+    Normaliza una entrada de versión a (número, filas), donde cada fila es
+    (pregunta, opciones, posición_respuesta, respuesta). Acepta tanto un
+    ExamVersion como la tupla clásica (número, lista_de_dicts).
+    """
+    if isinstance(entry, ExamVersion):
+        return entry.number, entry.items()
+    ver_num, questions = entry
+
+    def rows():
+        for q in questions:
+            try:
+                pos = q['opciones'].index(q['respuesta'])
+            except Exception:
+                pos = -1
+            yield q['pregunta'], q['opciones'], pos, q.get('respuesta', '')
+    return ver_num, rows()
+
+
+class FlowableStream(list):
+    """
+    Lista de flowables que se rellena bajo demanda desde un generador.
+    doc.build consulta len() en cada iteración, así que solo se mantienen en
+    memoria unos pocos cientos de flowables pendientes a la vez.
+    """
+
+    def __init__(self, source, window=256):
+        super().__init__()
+        self._source = iter(source)
+        self._window = window
+
+    def __len__(self):
+        n = super().__len__()
+        if self._source is not None and n < self._window:
+            before = n
+            self.extend(itertools.islice(self._source, self._window))
+            n = super().__len__()
+            if n - before < self._window:
+                self._source = None
+        return n
+
+
+def versions_flowables(title, versions, keys_for, styles, progress=None, subject=None):
+    """
+    Genera perezosamente los flowables de una parte del PDF de versiones: el
+    título (si no es None), las páginas de las versiones dadas y, si keys_for
+    no está vacío, la sección de claves de esas versiones, encabezada por
+    subject (por defecto seed_subject(keys_for)). Con progress, al final de
+    cada versión se dibuja una marca invisible que la cuenta.
+    """
+    from reportlab.platypus import PageBreak, Paragraph, Spacer
+    from reportlab.platypus.flowables import CallerMacro
+
+    question_style = styles['question']
+    option_style = styles['option']
+    answer_style = styles['answer']
+
+    if title is not None:
+        yield Paragraph(title, styles['title'])
+        yield Spacer(1, 12)
+
+    for ver_num, rows in map(version_rows, versions):
+        yield Paragraph(f"Versión {ver_num}", styles['sample']['Heading2'])
+        yield Spacer(1, 8)
+        for idx, (pregunta, opciones, _, _) in enumerate(rows, start=1):
+            yield prefixed_paragraph(f"{idx}. ", pregunta, question_style)
+            for opt_idx, opt in enumerate(opciones, start=1):
+                yield prefixed_paragraph(f"{chr(64+opt_idx)}. ", opt, option_style)
+            yield Spacer(1, 6)
+
+        if progress is not None:
+            yield CallerMacro(progress.version_done)
+        yield PageBreak()
+
+    if keys_for:
+        yield Paragraph("Claves de respuestas", styles['sample']['Heading1'])
+        if subject is None:
+            subject = seed_subject(keys_for)
+        if subject:
+            yield Paragraph(f"{subject} — permite regenerar cualquier versión o su clave.",
+                            styles['sample']['Normal'])
+        yield Spacer(1, 12)
+
+        for ver_num, rows in map(version_rows, keys_for):
+            yield Paragraph(f"Clave - Versión {ver_num}", styles['sample']['Heading2'])
+            yield Spacer(1, 8)
+            for idx, (_, _, pos, respuesta) in enumerate(rows, start=1):
+                letter = chr(65 + pos) if pos >= 0 else "N/A"
+                yield prefixed_paragraph(f"{idx}. {letter} — ", respuesta, answer_style)
+            yield PageBreak()
+
+
+def render_versions_part(filepath, title, versions, keys_for, number_pages=True, progress=None, subject=None):
+    """
+    Renderiza en filepath una parte del PDF de versiones (ver
+    versions_flowables). Devuelve el número de páginas.
+    """
+    if subject is None:
+        subject = seed_subject(itertools.chain(versions, keys_for))
+    doc = new_doc(filepath, subject=subject)
+    build_doc(doc, versions_flowables(title, versions, keys_for, pdf_styles(), progress, subject),
+              page_callback(number_pages, progress))
+    return doc.page
+
+
+def render_versions_dir(versions_list, outdir, title="Examen - Múltiples versiones", progress=None):
+    """
+    Escribe cada versión en su propio archivo (version_001.pdf, ...) y las
+    claves en keys.pdf dentro de outdir. La memoria queda acotada por el
+    tamaño de una sola versión, sin importar cuántas se generen.
+    """
+    versions_list = list(versions_list)
+    os.makedirs(outdir, exist_ok=True)
+    for entry in versions_list:
+        ver_num = entry.number if isinstance(entry, ExamVersion) else entry[0]
+        render_versions_part(os.path.join(outdir, f"version_{ver_num:03d}.pdf"), title, [entry], [],
+                             progress=progress)
+    render_versions_part(os.path.join(outdir, "keys.pdf"), title, [], versions_list, progress=progress)
+
+
+_worker_bank = None
+
+
+def _init_worker(bank):
+    # cada proceso del pool recibe el banco una sola vez, no con cada tarea.
+    # el perfil heredado del proceso principal no se podría volcar: se descarta
+    global _worker_bank
+    quiz_profile.current = None
+    _worker_bank = bank
+
+
+def _detach(entry, bank):
+    """Copia de una versión de bank sin el banco ni el muestreador, para enviarla al pool."""
+    if not isinstance(entry, ExamVersion) or entry.bank is not bank:
+        return entry
+    return ExamVersion(entry.number, None, entry.order, entry.perms, entry.keys, entry.seed,
+                       entry.balanced, entry.perm_start)
+
+
+def _render_versions_part_file(args):
+    # punto de entrada de cada proceso del pool: devuelve la ruta y sus páginas
+    filepath, title, versions, keys_for, subject = args
+    for entry in itertools.chain(versions, keys_for):
+        if isinstance(entry, ExamVersion) and entry.bank is None:
+            entry.bank = _worker_bank
+    return filepath, render_versions_part(filepath, title, versions, keys_for, number_pages=False,
+                                          subject=subject)
+
+
+# versiones por tarea del pool: tareas cortas para que el avance se mueva a
+# menudo y un proceso cancelado pierda poco trabajo
+PARALLEL_TASK_VERSIONS = 4
+
+
+def build_versions_parallel(versions_list, filepath, title, workers, progress=None):
+    """
+    Renderiza las versiones en un pool de procesos, en tareas de a lo sumo
+    PARALLEL_TASK_VERSIONS versiones, cada una como PDF independiente (sin
+    numerar), más la sección de claves; une todo en filepath estampando la
+    numeración global de páginas. El banco compartido se envía una vez a
+    cada proceso y las tareas solo llevan los índices de sus versiones. Con progress, el avance se actualiza cada
+    vez que termina una tarea (en el orden en que terminan); al cancelar se
+    terminan los procesos en lugar de esperar las tareas en curso.
+    """
+    import io
+    import multiprocessing
+    import shutil
+    import tempfile
+    from pypdf import PdfReader, PdfWriter
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+
+    subject = seed_subject(versions_list)
+    bank = next((entry.bank for entry in versions_list if isinstance(entry, ExamVersion)), None)
+    detached = [_detach(entry, bank) for entry in versions_list]
+    chunk = max(1, min(PARALLEL_TASK_VERSIONS, -(-len(detached) // workers)))
+    chunks = [detached[i:i + chunk] for i in range(0, len(detached), chunk)]
+    tmpdir = tempfile.mkdtemp(prefix="versiones_")
+    try:
+        tasks = []
+        for i, part in enumerate(chunks):
+            tasks.append((os.path.join(tmpdir, f"part_{i:04d}.pdf"), title if i == 0 else None, part, [], subject))
+        keys = (os.path.join(tmpdir, "claves.pdf"), None, [], detached, subject)
+        parts = [task[0] for task in tasks] + [keys[0]]
+        versions_in = {task[0]: len(task[2]) for task in tasks}
+
+        with quiz_profile.stage("renderizar partes (procesos)"):
+            pool = multiprocessing.Pool(workers, initializer=_init_worker, initargs=(bank,))
+            try:
+                # las claves (la tarea más larga) se encolan primero para no quedar solas al final
+                results = pool.imap_unordered(_render_versions_part_file, [keys] + tasks)
+                for _ in range(len(parts)):
+                    # se espera por intervalos cortos para poder atender una cancelación
+                    while True:
+                        try:
+                            path, pages = results.next(timeout=0.2)
+                            break
+                        except multiprocessing.TimeoutError:
+                            if progress is not None:
+                                progress.check()
+                    if progress is not None:
+                        progress.versions_done += versions_in.get(path, 0)
+                        progress.pages += pages
+                        progress.check()
+                pool.close()
+            except BaseException:
+                pool.terminate()
+                raise
+            finally:
+                pool.join()
+
+        with quiz_profile.stage("unir y numerar partes"):
+            writer = PdfWriter()
+            for part in parts:
+                writer.append(PdfReader(part))
+
+            buf = io.BytesIO()
+            cnv = canvas.Canvas(buf, pagesize=letter)
+            for page in range(1, len(writer.pages) + 1):
+                draw_page_number(cnv, page)
+                cnv.showPage()
+            cnv.save()
+            numbers = PdfReader(buf)
+            for page, overlay in zip(writer.pages, numbers.pages):
+                page.merge_page(overlay)
+
+            writer.add_metadata({"/Subject": subject})
+            with open(filepath, "wb") as f:
+                writer.write(f)
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+def render_versions_pdf(versions_list, filepath, title="Examen - Múltiples versiones", workers=1, progress=None):
+    """
+    Genera el PDF con todas las versiones y sus claves. Con workers > 1 (y
+    pypdf instalado) el renderizado se reparte en un pool de procesos.
+    """
+    versions_list = list(versions_list)
+    workers = min(workers or os.cpu_count() or 1, len(versions_list))
+    if workers > 1 and PARALLEL_PDF_AVAILABLE:
+        build_versions_parallel(versions_list, filepath, title, workers, progress)
+    else:
+        render_versions_part(filepath, title, versions_list, versions_list, progress=progress)
@@ -0,0 +1,157 @@
+"""
+Instrumentación opcional de la exportación a PDF.
+
+Se activa con la variable de entorno QUIZ_PROFILE (o con --profile en
+quiz_cli generate):
+
+- QUIZ_PROFILE=json: tiempos por etapa (generar versiones, construir
+  flowables, encabezado y pie, maquetación de ReportLab en doc.build, ...)
+  y contadores (párrafos creados, páginas emitidas, logos dibujados)
+  junto al PDF exportado: versiones.pdf -> versiones.perfil.json (o
+  perfil.json dentro de la carpeta de una exportación por archivos).
+- QUIZ_PROFILE=cprofile: lo mismo y además el volcado de cProfile en
+  versiones.prof (se abre con pstats o snakeviz).
+
+Desactivada no cuesta nada: current es None y el renderizado solo lo
+consulta una vez por documento. Con la exportación en paralelo solo se
+miden las etapas del proceso principal.
+"""
+import contextlib
+import json
+import os
+import time
+
+ENV_VAR = "QUIZ_PROFILE"
+MODES = ("json", "cprofile")
+
+# perfil de la exportación en curso (None = instrumentación desactivada)
+current = None
+
+_NO_STAGE = contextlib.nullcontext()
+
+
+class ExportProfile:
+    """Tiempos acumulados por etapa y contadores de una exportación."""
+
+    def __init__(self, mode="json"):
+        self.mode = mode
+        self.timings = {}
+        self.counters = {}
+        self.started = None
+        self.cprofile = None
+        # archivos escritos por dump()
+        self.paths = []
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def add_time(self, name, seconds):
+        self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def flowables(self, source):
+        """Envuelve el generador de flowables: mide el tiempo de construirlos y los cuenta por tipo."""
+        timings = self.timings
+        counters = self.counters
+        clock = time.perf_counter
+        source = iter(source)
+        while True:
+            start = clock()
+            try:
+                item = next(source)
+            except StopIteration:
+                timings["flowables"] = timings.get("flowables", 0.0) + clock() - start
+                return
+            timings["flowables"] = timings.get("flowables", 0.0) + clock() - start
+            name = type(item).__name__
+            counters[name] = counters.get(name, 0) + 1
+            yield item
+
+    def on_page(self, callback):
+        """Envuelve el callback de página (encabezado, pie y avance): lo mide y cuenta las páginas."""
+        def on_page(cnv, doc):
+            start = time.perf_counter()
+            try:
+                callback(cnv, doc)
+            finally:
+                self.add_time("encabezado y pie", time.perf_counter() - start)
+                self.count("páginas")
+        return on_page
+
+    def start(self):
+        self.started = time.perf_counter()
+        if self.mode == "cprofile":
+            import cProfile
+            self.cprofile = cProfile.Profile()
+            self.cprofile.enable()
+
+    def stop(self):
+        if self.cprofile is not None:
+            self.cprofile.disable()
+        self.add_time("total", time.perf_counter() - self.started)
+
+    def report(self):
+        """Tiempos (en segundos) y contadores; la maquetación es doc.build sin lo que se mide por separado."""
+        timings = dict(self.timings)
+        if "doc.build" in timings:
+            timings["maquetación ReportLab"] = max(0.0, timings["doc.build"] - timings.get("flowables", 0.0)
+                                                   - timings.get("encabezado y pie", 0.0))
+        return {"tiempos_s": {k: round(v, 6) for k, v in sorted(timings.items(), key=lambda kv: -kv[1])},
+                "contadores": dict(sorted(self.counters.items()))}
+
+    def dump(self, target):
+        """Escribe el perfil junto a target (archivo exportado) o dentro de él si es una carpeta."""
+        if os.path.isdir(target):
+            base = os.path.join(target, "perfil")
+        else:
+            base = os.path.splitext(target)[0] + ".perfil"
+        self.paths = [base + ".json"]
+        with open(self.paths[0], "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, ensure_ascii=False, indent=2)
+        if self.cprofile is not None:
+            self.paths.append(os.path.splitext(base)[0] + ".prof")
+            self.cprofile.dump_stats(self.paths[1])
+        return self.paths
+
+
+def mode_from_env():
+    mode = os.environ.get(ENV_VAR, "").strip().lower()
+    if mode and mode not in MODES:
+        raise ValueError(f"{ENV_VAR} debe ser uno de: {', '.join(MODES)}")
+    return mode or None
+
+
+@contextlib.contextmanager
+def profiled(target, mode=None):
+    """
+    Perfila el bloque si la instrumentación está activa (mode, o si es None
+    la variable QUIZ_PROFILE) y al terminar deja el perfil junto a target.
+    Si el bloque falla no se escribe nada.
+    """
+    global current
+    mode = mode or mode_from_env()
+    if mode is None or target is None:
+        yield None
+        return
+    profile = current = ExportProfile(mode)
+    profile.start()
+    try:
+        yield profile
+    finally:
+        profile.stop()
+        current = None
+    profile.dump(target)
+
+
+def stage(name):
+    """Context manager que mide una etapa en el perfil activo (no hace nada si no lo hay)."""
+    if current is None:
+        return _NO_STAGE
+    return current.stage(name)
@@ -0,0 +1,255 @@
+"""
+Índice invertido para buscar preguntas del banco por palabras.
+
+Las palabras de la pregunta y de sus opciones se pasan a minúsculas y sin
+tildes ("Dirección" -> "direccion"), así que la búsqueda no distingue
+mayúsculas ni acentos. El índice se mantiene con las mismas operaciones
+del diario de cambios (add, insert, edit, delete, reorder, options) en lugar de
+reconstruirse en cada cambio.
+"""
+import bisect
+import operator
+import re
+import unicodedata
+from itertools import compress
+
+# la última palabra de la consulta se busca como prefijo a partir de esta longitud
+MIN_PREFIX = 3
+# una palabra es "densa" si aparece en más de 1/DENSE_RATIO de las preguntas
+DENSE_RATIO = 16
+
+_BIT_MASK = bytes.maketrans(b"01", b"\x00\x01")
+
+_MARKS = re.compile("[̀-ͯ]")
+_WORD = re.compile(r"\w+")
+
+
+def fold(text):
+    """Minúsculas y sin tildes ni diacríticos."""
+    return _MARKS.sub("", unicodedata.normalize("NFKD", text.casefold()))
+
+
+def tokens(text):
+    return _WORD.findall(fold(text))
+
+
+def question_tokens(q):
+    return set(tokens("\n".join([q["pregunta"], *q["opciones"]])))
+
+
+class SearchIndex:
+    """
+    Cada pregunta recibe un id de documento estable; postings guarda, por
+    palabra, el conjunto de ids que la contienen, e ids la posición actual
+    de cada documento en el banco. Reordenar o borrar solo toca ids; las
+    posiciones de los resultados se calculan al buscar.
+
+    Las palabras densas (presentes en buena parte del banco) tienen además
+    un mapa de bits (un int de Python, bit = id de documento): intersecar
+    dos de ellas es un AND de enteros en lugar de recorrer conjuntos de
+    decenas de miles de elementos.
+    """
+
+    def __init__(self, questions=()):
+        self.postings = {}
+        self.ids = []
+        self.next_id = 0
+        # True mientras ids[p] == p (no hubo borrados ni reordenamientos)
+        self.identity = True
+        self._bits = {}
+        # vocabulario ordenado (para prefijos), mapa id -> posición y
+        # itemgetter que reordena una máscara por posición: se rehacen al
+        # buscar solo si algún cambio los invalidó
+        self._vocab = None
+        self._pos = None
+        self._gather = None
+        for q in questions:
+            self.add(q)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _index(self, doc, q):
+        postings = self.postings
+        cached = self._bits
+        for word in question_tokens(q):
+            docs = postings.get(word)
+            if docs is None:
+                docs = postings[word] = set()
+                self._vocab = None
+            docs.add(doc)
+            bits = cached.get(word)
+            if bits is not None:
+                cached[word] = bits | (1 << doc)
+
+    def _unindex(self, doc, q):
+        postings = self.postings
+        cached = self._bits
+        for word in question_tokens(q):
+            docs = postings.get(word)
+            if docs is None or doc not in docs:
+                continue
+            docs.discard(doc)
+            if not docs:
+                del postings[word]
+                cached.pop(word, None)
+                self._vocab = None
+            elif word in cached:
+                cached[word] ^= 1 << doc
+
+    def add(self, q):
+        doc = self.next_id
+        self.next_id += 1
+        self._index(doc, q)
+        self.ids.append(doc)
+        self._gather = None
+        if self._pos is not None:
+            self._pos[doc] = len(self.ids) - 1
+
+    def insert(self, i, q):
+        self.add(q)
+        if i < len(self.ids) - 1:
+            self.ids.insert(i, self.ids.pop())
+            self.identity = False
+            self._pos = None
+            self._gather = None
+
+    def edit(self, i, old, q):
+        doc = self.ids[i]
+        self._unindex(doc, old)
+        self._index(doc, q)
+
+    def delete(self, i, old):
+        self._unindex(self.ids[i], old)
+        del self.ids[i]
+        self.identity = False
+        self._pos = None
+        self._gather = None
+
+    def reorder(self, order):
+        ids = self.ids
+        self.ids = [ids[i] for i in order]
+        self.identity = False
+        self._pos = None
+        self._gather = None
+
+    def apply(self, op, old=None, **fields):
+        """
+        Aplica una operación con el formato del diario (ver apply_ops en
+        quiz_bank). edit y delete necesitan además la pregunta anterior
+        (old) para retirar sus palabras; options no cambia las palabras.
+        """
+        if op == "add":
+            self.add(fields["q"])
+        elif op == "insert":
+            self.insert(fields["i"], fields["q"])
+        elif op == "edit":
+            self.edit(fields["i"], old, fields["q"])
+        elif op == "delete":
+            self.delete(fields["i"], old)
+        elif op == "reorder":
+            self.reorder(fields["order"])
+
+    def _dense(self, size):
+        return size * DENSE_RATIO > len(self.ids)
+
+    def _set_bits(self, docs):
+        n = self.next_id
+        digits = bytearray(b"0") * n
+        for doc in docs:
+            digits[n - 1 - doc] = 49
+        return int(digits, 2)
+
+    def _word_bits(self, word):
+        bits = self._bits.get(word)
+        if bits is None:
+            bits = self._bits[word] = self._set_bits(self.postings[word])
+        return bits
+
+    def _mask(self, bits):
+        """bytes con mask[id] == 1 si el bit id está activo."""
+        return format(bits, "b")[::-1].ljust(self.next_id, "0").encode("ascii").translate(_BIT_MASK)
+
+    def _term(self, word, prefix):
+        """
+        [tamaño, conjunto de ids o None, bits o None, palabra o None] de una
+        palabra o, con prefix, de todas las palabras que empiezan así.
+        """
+        postings = self.postings
+        if prefix:
+            if self._vocab is None:
+                self._vocab = sorted(postings)
+            vocab = self._vocab
+            start = bisect.bisect_left(vocab, word)
+            words = vocab[start:bisect.bisect_left(vocab, word + "\U0010ffff", start)]
+        else:
+            words = [word] if word in postings else []
+        if not words:
+            return None
+        if len(words) == 1:
+            docs = postings[words[0]]
+            return [len(docs), docs, None, words[0]]
+        sets = [postings[w] for w in words]
+        if not self._dense(sum(map(len, sets))):
+            docs = set().union(*sets)
+            return [len(docs), docs, None, None]
+        bits = 0
+        for w, docs in zip(words, sets):
+            bits |= self._word_bits(w) if self._dense(len(docs)) else self._set_bits(docs)
+        return [bits.bit_count(), None, bits, None]
+
+    def search(self, query):
+        """
+        Posiciones (ordenadas) de las preguntas que contienen todas las
+        palabras de la consulta. La última, si aún se está escribiendo, vale
+        como prefijo; con menos de MIN_PREFIX letras todavía no filtra.
+        None si no queda ninguna palabra (sin filtro).
+        """
+        words = tokens(query)
+        typing = bool(words) and not query[-1:].isspace()
+        if typing and len(words[-1]) < MIN_PREFIX:
+            words.pop()
+            typing = False
+        if not words:
+            return None
+        terms = []
+        for n, word in enumerate(words, start=1):
+            term = self._term(word, typing and n == len(words))
+            if term is None:
+                return []
+            terms.append(term)
+        terms.sort(key=lambda t: t[0])
+
+        size, hits, bits, word = terms[0]
+        if hits is not None and not self._dense(size):
+            # pocos candidatos: se filtran con los conjuntos (o mapas de bits) del resto
+            for _, docs, bits, _ in terms[1:]:
+                if docs is not None:
+                    hits = hits.intersection(docs)
+                else:
+                    mask = self._mask(bits)
+                    hits = {doc for doc in hits if mask[doc]}
+            return self._sparse_positions(hits)
+
+        result = -1
+        for _, docs, bits, word in terms:
+            result &= bits if bits is not None else self._word_bits(word)
+        return self._dense_positions(self._mask(result))
+
+    def _sparse_positions(self, hits):
+        if self.identity:
+            return sorted(hits)
+        if self._pos is None:
+            self._pos = {doc: p for p, doc in enumerate(self.ids)}
+        pos = self._pos
+        return sorted([pos[doc] for doc in hits])
+
+    def _dense_positions(self, mask):
+        ids = self.ids
+        if self.identity:
+            return list(compress(range(len(ids)), mask))
+        if len(ids) < 2:
+            return list(compress(range(len(ids)), map(mask.__getitem__, ids)))
+        if self._gather is None:
+            self._gather = operator.itemgetter(*ids)
+        return list(compress(range(len(ids)), self._gather(mask)))
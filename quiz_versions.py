@@ -0,0 +1,417 @@
+import hashlib
+import math
+import random
+from array import array
+from quiz_bank import META_KEYS, QuestionBank
+
+
+def freeze_bank(questions):
+    """
+    Devuelve el banco compartido por todas las versiones: un QuestionBank
+    (textos únicos y opciones como ids enteros). Si ya se recibe un
+    QuestionBank se usa tal cual y no debe modificarse mientras existan
+    versiones generadas a partir de él.
+    """
+    if isinstance(questions, QuestionBank):
+        return questions
+    return QuestionBank.from_questions(questions)
+
+
+class ExamVersion:
+    """
+    Una versión del examen expresada solo con índices sobre el banco:
+    el orden de las preguntas, la permutación de opciones de cada pregunta
+    y la clave de respuestas derivada de esa permutación.
+
+    Si la versión usa todo el banco, perms sigue los offsets del banco
+    (opt_start por id de pregunta); si es una muestra (sampler), perms solo
+    cubre las preguntas elegidas, por posición, con sus propios perm_start.
+    """
+    __slots__ = ("number", "bank", "order", "perms", "keys", "seed", "balanced", "perm_start", "sampler")
+
+    def __init__(self, number, bank, order, perms, keys, seed=None, balanced=False,
+                 perm_start=None, sampler=None):
+        self.number = number
+        self.bank = bank
+        self.order = order
+        self.perms = perms
+        self.keys = keys
+        # semilla maestra de la tanda: con ella y el número se regenera la versión
+        self.seed = seed
+        # generada con generate_balanced_versions (se regenera con generate_balanced_version)
+        self.balanced = balanced
+        self.perm_start = perm_start
+        # StratifiedSampler con el que se eligieron las preguntas (None = todo el banco)
+        self.sampler = sampler
+
+    def __len__(self):
+        return len(self.order)
+
+    def option_order(self, pos):
+        """Permutación de opciones (índices originales) de la pregunta en la posición pos."""
+        if self.perm_start is not None:
+            return self.perms[self.perm_start[pos]:self.perm_start[pos + 1]]
+        qi = self.order[pos]
+        start = self.bank.opt_start
+        return self.perms[start[qi]:start[qi + 1]]
+
+    def items(self):
+        """
+        Recorre la versión en su orden, devolviendo
+        (pregunta, opciones_en_orden, posición_respuesta, respuesta).
+        La posición es -1 cuando la respuesta no está entre las opciones.
+        """
+        bank = self.bank
+        for pos, qi in enumerate(self.order):
+            opciones = bank.options(qi)
+            shown = tuple(opciones[i] for i in self.option_order(pos))
+            yield bank.texts[qi], shown, self.keys[pos], bank.answer_text(qi)
+
+    def answer_key(self):
+        """Letras de la clave de respuestas ('N/A' si la respuesta no está entre las opciones)."""
+        return [chr(65 + k) if k >= 0 else "N/A" for k in self.keys]
+
+
+class StratifiedSampler:
+    """
+    Elige `size` preguntas por versión repartidas entre los estratos del
+    banco (combinaciones de los campos `by`, por defecto tema y
+    dificultad; las preguntas sin esos campos forman el estrato None).
+
+    Los índices por estrato se calculan una vez al crear el muestreador;
+    sacar una versión cuesta O(size), no O(banco). El cupo de cada estrato
+    es proporcional a su tamaño (restos mayores) salvo que se den quotas
+    explícitas ({valor: n} con un solo campo, {(tema, dificultad): n} con dos).
+
+    Control del solapamiento: dentro de cada estrato las versiones se
+    reparten por rondas; en una ronda cada versión toma un bloque distinto
+    de una permutación del estrato, así que las primeras disjoint_versions
+    versiones no comparten ninguna pregunta. Cada ronda usa otra
+    permutación (una base aleatoria fija compuesta con un mapa afín propio
+    de la ronda), de modo que las repeticiones se reparten por todo el
+    estrato en lugar de repetir los mismos grupos.
+    """
+
+    def __init__(self, questions, size, by=META_KEYS, quotas=None):
+        bank = freeze_bank(questions)
+        self.bank = bank
+        self.by = tuple(by)
+        fields = [META_KEYS.index(f) for f in self.by]
+        keys = [tuple(stratum[f] for f in fields) for stratum in bank.strata]
+        groups = {}
+        strata_of = bank.strata_of
+        for qid in bank.order:
+            key = keys[strata_of[qid]]
+            pool = groups.get(key)
+            if pool is None:
+                pool = groups[key] = array('I')
+            pool.append(qid)
+        self.groups = groups
+        self.quotas = self._resolve_quotas(size, quotas)
+        self.size = sum(self.quotas.values())
+        self.disjoint_versions = min((len(groups[k]) // q for k, q in self.quotas.items() if q),
+                                     default=0)
+        self._bases = {}
+
+    def _resolve_quotas(self, size, quotas):
+        groups = self.groups
+        total = sum(len(pool) for pool in groups.values())
+        if quotas is not None:
+            resolved = {}
+            for key, count in quotas.items():
+                key = key if isinstance(key, tuple) else (key,)
+                if key not in groups:
+                    raise ValueError(f"No hay preguntas en el estrato {_stratum_label(key)}")
+                if count > len(groups[key]):
+                    raise ValueError(f"El estrato {_stratum_label(key)} solo tiene {len(groups[key])} preguntas "
+                                     f"(se pidieron {count})")
+                resolved[key] = count
+            return resolved
+        if not 0 < size <= total:
+            raise ValueError(f"El número de preguntas por versión debe estar entre 1 y {total}")
+        # reparto proporcional por restos mayores
+        exact = {key: size * len(pool) / total for key, pool in groups.items()}
+        resolved = {key: int(share) for key, share in exact.items()}
+        missing = size - sum(resolved.values())
+        for key in sorted(exact, key=lambda k: exact[k] - resolved[k], reverse=True)[:missing]:
+            resolved[key] += 1
+        return resolved
+
+    def _base(self, seed, key):
+        base = self._bases.get((seed, key))
+        if base is None:
+            base = array('I', self.groups[key])
+            random.Random(version_seed(seed, f"muestra:{key!r}")).shuffle(base)
+            self._bases[(seed, key)] = base
+        return base
+
+    def draw(self, seed, number):
+        """Ids de las preguntas de la versión `number` (sin barajar), en O(size)."""
+        chosen = array('I')
+        for key, quota in self.quotas.items():
+            if not quota:
+                continue
+            base = self._base(seed, key)
+            pool = len(base)
+            rnd, slot = divmod(number - 1, pool // quota)
+            rng = random.Random(version_seed(seed, f"muestra:{key!r}:{rnd}"))
+            step = rng.randrange(1, pool) if pool > 1 else 1
+            while math.gcd(step, pool) != 1:
+                step = rng.randrange(1, pool)
+            shift = rng.randrange(pool)
+            first = slot * quota
+            chosen.extend(base[(step * i + shift) % pool] for i in range(first, first + quota))
+        return chosen
+
+    def describe(self):
+        text = f"{self.size} de {len(self.bank)} preguntas por versión"
+        if len(self.groups) > 1:
+            text += f", estratificadas por {' y '.join(self.by)}"
+        return text
+
+
+def _stratum_label(key):
+    return " / ".join("sin valor" if v is None else str(v) for v in key)
+
+
+def check_fingerprint(questions, expected):
+    """
+    Comprueba que questions es el banco de la tanda original, cuya huella
+    (expected) aparece junto a la semilla en la hoja de claves: con otro
+    banco, o el mismo en otro orden, la semilla da otras versiones y otras
+    claves. Lanza ValueError si no coincide; devuelve el banco congelado.
+    """
+    bank = freeze_bank(questions)
+    expected = expected.strip().lower()
+    if expected != bank.fingerprint():
+        raise ValueError(f"El banco actual (huella {bank.fingerprint()}) no es el de la tanda (huella {expected}): "
+                         "las versiones y claves regeneradas no coincidirían con las originales")
+    return bank
+
+
+def new_master_seed():
+    """Semilla maestra corta (fácil de anotar) para una nueva tanda de versiones."""
+    return random.SystemRandom().randrange(1, 10**9)
+
+
+def version_seed(master_seed, number):
+    """
+    Semilla propia de la versión `number`, derivada de la maestra con un
+    hash: cada versión tiene su flujo aleatorio independiente de las demás.
+    """
+    digest = hashlib.sha256(f"{master_seed}:{number}".encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big")
+
+
+def _sample_perms(bank, order, rng, letter_of=None):
+    """
+    Permutaciones de opciones por posición para una versión muestreada:
+    devuelve (perms, perm_start, keys). letter_of(pos, qi) fija la letra de
+    la respuesta (None = al azar).
+    """
+    offsets = bank.opt_start
+    answers = bank.answers
+    perms = array('B')
+    perm_start = array('I', [0])
+    keys = array('b')
+    for pos, qi in enumerate(order):
+        count = offsets[qi + 1] - offsets[qi]
+        ans = answers[qi]
+        if ans < 0:
+            perm = list(range(count))
+            rng.shuffle(perm)
+            keys.append(-1)
+        elif letter_of is None:
+            perm = list(range(count))
+            rng.shuffle(perm)
+            keys.append(perm.index(ans))
+        else:
+            perm = [i for i in range(count) if i != ans]
+            rng.shuffle(perm)
+            letter = letter_of(pos, qi)
+            perm.insert(letter, ans)
+            keys.append(letter)
+        perms.extend(perm)
+        perm_start.append(len(perms))
+    return perms, perm_start, keys
+
+
+def generate_version(questions, number, seed, sampler=None):
+    """
+    Genera solo la versión `number` de la tanda con semilla maestra `seed`,
+    sin calcular las versiones 1..number-1. Devuelve la misma versión que
+    generate_versions(questions, n, seed) para cualquier n >= number.
+
+    Con sampler (StratifiedSampler) la versión solo contiene las preguntas
+    que este elige; se usa el banco del muestreador.
+    """
+    bank = sampler.bank if sampler is not None else freeze_bank(questions)
+    rng = random.Random(version_seed(seed, number))
+    if sampler is not None:
+        order = sampler.draw(seed, number)
+        rng.shuffle(order)
+        perms, perm_start, keys = _sample_perms(bank, order, rng)
+        return ExamVersion(number, bank, order, perms, keys, seed, perm_start=perm_start, sampler=sampler)
+
+    offsets = bank.opt_start
+    answers = bank.answers
+
+    order = array('I', bank.order)
+    rng.shuffle(order)
+    perms = array('B')
+    for qi in range(len(bank.texts)):
+        perm = list(range(offsets[qi + 1] - offsets[qi]))
+        rng.shuffle(perm)
+        perms.extend(perm)
+    keys = array('b')
+    for qi in order:
+        ans = answers[qi]
+        if ans < 0:
+            keys.append(-1)
+        else:
+            keys.append(perms.index(ans, offsets[qi], offsets[qi + 1]) - offsets[qi])
+    return ExamVersion(number, bank, order, perms, keys, seed)
+
+
+def generate_versions(questions, n, seed=None, sampler=None):
+    """
+    Genera n versiones barajadas que comparten un único banco inmutable.
+    La memoria por versión crece con el número de índices, no con el texto.
+    Cada versión usa su propio flujo aleatorio derivado de la semilla
+    maestra (una nueva si seed es None), guardada en ExamVersion.seed.
+    Con sampler cada versión contiene solo una muestra del banco.
+    """
+    bank = sampler.bank if sampler is not None else freeze_bank(questions)
+    if seed is None:
+        seed = new_master_seed()
+    return [generate_version(bank, num, seed, sampler) for num in range(1, n + 1)]
+
+
+def hamming(a, b):
+    """Posiciones en las que difieren dos secuencias de igual longitud."""
+    return sum(1 for x, y in zip(a, b) if x != y)
+
+
+def generate_balanced_versions(questions, n, seed=None, min_order_distance=None,
+                               min_key_distance=None, max_attempts=50, sampler=None):
+    """
+    Genera n versiones con restricciones:
+
+    - la letra de la respuesta correcta de cada pregunta rota con el número
+      de versión a partir de una letra base repartida en round-robin, así
+      que las letras quedan balanceadas dentro de cada versión y, para cada
+      pregunta, a lo largo de las versiones;
+    - cualquier par de versiones difiere al menos en min_order_distance
+      posiciones del orden de preguntas y en min_key_distance posiciones de
+      la clave (por defecto N/2 y la mitad de lo esperado al azar).
+
+    Cada candidata sale de su propio flujo aleatorio (semilla maestra,
+    versión e intento) y se compara con las ya aceptadas: el orden mediante
+    un índice posición -> pregunta -> versiones (O(N + coincidencias)) y la
+    clave con un XOR de enteros empaquetados. Regenerar la versión k
+    requiere recalcular (solo en memoria) las versiones 1..k.
+
+    Con sampler cada versión es una muestra del banco; como cada pregunta
+    aparece solo en algunas versiones, las letras se reparten al azar entre
+    las posiciones de la versión en partes iguales (balance exacto por
+    versión, aproximado por pregunta).
+    """
+    bank = sampler.bank if sampler is not None else freeze_bank(questions)
+    if seed is None:
+        seed = new_master_seed()
+    size = sampler.size if sampler is not None else len(bank)
+    offsets = bank.opt_start
+    answers = bank.answers
+    counts = [offsets[qi + 1] - offsets[qi] for qi in range(len(bank.texts))]
+    if min_order_distance is None:
+        min_order_distance = size // 2
+    if min_key_distance is None:
+        fewest = min((counts[qi] for qi in bank.order), default=2)
+        min_key_distance = int(size * (1 - 1 / fewest) / 2)
+    if n > 1 and max(min_order_distance, min_key_distance) > size:
+        raise ValueError(f"La distancia mínima entre versiones no puede superar el número de preguntas ({size}).")
+
+    if sampler is None:
+        # letra base de cada pregunta: round-robin sobre un orden aleatorio fijo
+        base = random.Random(version_seed(seed, "base"))
+        shuffled = list(bank.order)
+        base.shuffle(shuffled)
+        base_letter = {qi: pos % counts[qi] for pos, qi in enumerate(shuffled)}
+
+    index = [{} for _ in range(size)]
+    accepted_keys = []
+    versions = []
+    for num in range(1, n + 1):
+        for attempt in range(max_attempts):
+            rng = random.Random(version_seed(seed, f"{num}/{attempt}"))
+            order = sampler.draw(seed, num) if sampler is not None else array('I', bank.order)
+            rng.shuffle(order)
+
+            agreements = {}
+            for pos, qi in enumerate(order):
+                for other in index[pos].get(qi, ()):
+                    agreements[other] = agreements.get(other, 0) + 1
+            if versions and size - max(agreements.values(), default=0) < min_order_distance:
+                continue
+
+            if sampler is not None:
+                # permutación de 0..size-1 módulo el número de opciones: cada letra
+                # aparece el mismo número de veces en la versión
+                pattern = list(range(size))
+                rng.shuffle(pattern)
+                key = array('b', [pattern[pos] % counts[qi] if answers[qi] >= 0 else -1
+                                  for pos, qi in enumerate(order)])
+            else:
+                key = array('b', [(base_letter[qi] + num - 1) % counts[qi] if answers[qi] >= 0 else -1
+                                  for qi in order])
+            packed = int.from_bytes(key.tobytes(), "big")
+            if any(size - (packed ^ other).to_bytes(size, "big").count(0) < min_key_distance
+                   for other in accepted_keys):
+                continue
+            break
+        else:
+            raise ValueError(f"No se pudo generar la versión {num} con distancia mínima "
+                             f"{min_order_distance} (orden) / {min_key_distance} (clave) "
+                             f"tras {max_attempts} intentos; reduzca las distancias pedidas.")
+
+        if sampler is not None:
+            perms, perm_start, _ = _sample_perms(bank, order, rng, lambda pos, qi: key[pos])
+        else:
+            perm_start = None
+            perms = array('B')
+            letters = {qi: key[pos] for pos, qi in enumerate(order)}
+            for qi in range(len(bank.texts)):
+                ans = answers[qi]
+                if ans < 0 or qi not in letters:
+                    perm = list(range(counts[qi]))
+                    rng.shuffle(perm)
+                else:
+                    perm = [i for i in range(counts[qi]) if i != ans]
+                    rng.shuffle(perm)
+                    perm.insert(letters[qi], ans)
+                perms.extend(perm)
+
+        for pos, qi in enumerate(order):
+            index[pos].setdefault(qi, []).append(num)
+        accepted_keys.append(packed)
+        versions.append(ExamVersion(num, bank, order, perms, key, seed, balanced=True,
+                                    perm_start=perm_start, sampler=sampler))
+    return versions
+
+
+def generate_balanced_version(questions, number, seed, **constraints):
+    """Regenera la versión `number` de una tanda balanceada (recalcula 1..number en memoria)."""
+    return generate_balanced_versions(questions, number, seed, **constraints)[-1]
+
+
+def regenerate_versions(questions, numbers, seed, balanced=False, sampler=None, **constraints):
+    """
+    Regenera las versiones `numbers` de la tanda con semilla maestra seed,
+    en ese orden. Las balanceadas dependen de las anteriores: se recalculan
+    1..max(numbers) en memoria y se devuelven las pedidas.
+    """
+    bank = sampler.bank if sampler is not None else freeze_bank(questions)
+    if balanced:
+        versions = generate_balanced_versions(bank, max(numbers), seed, sampler=sampler, **constraints)
+        return [versions[k - 1] for k in numbers]
+    return [generate_version(bank, k, seed, sampler) for k in numbers]
@@ -0,0 +1,148 @@
+"""
+Vigilancia del archivo del banco y recarga incremental.
+
+BankWatcher sondea (mtime, tamaño) del archivo, sin servicios externos.
+Cuando cambia, diff_banks compara el banco releído con el que está en
+memoria por el contenido de cada pregunta y devuelve solo las preguntas
+añadidas, modificadas o eliminadas (y, si hace falta, un reordenamiento)
+como operaciones con el formato del diario (ver apply_ops en quiz_bank),
+que se aplican a la lista y al índice de búsqueda sin reconstruirlos.
+"""
+import os
+from collections import defaultdict, deque
+
+
+def file_stamp(path):
+    """(mtime en ns, tamaño) del archivo, o None si no existe (p. ej. a mitad de un guardado)."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def question_key(q):
+    """Clave de contenido de una pregunta: dos preguntas con la misma clave son idénticas."""
+    return (q["pregunta"], tuple(q["opciones"]), q.get("respuesta"), q.get("tema"), q.get("dificultad"))
+
+
+class BankWatcher:
+    """Detecta por sondeo los cambios del archivo del banco desde el último acknowledge()."""
+
+    def __init__(self, path):
+        self.path = path
+        self.stamp = file_stamp(path)
+
+    def changed(self):
+        stamp = file_stamp(self.path)
+        return stamp is not None and stamp != self.stamp
+
+    def acknowledge(self, stamp):
+        """Da por vista la versión del archivo con ese stamp (tomado antes de leerlo)."""
+        self.stamp = stamp
+
+
+class BankDiff:
+    """
+    Resultado de diff_banks. changes es la lista de (op, pregunta anterior,
+    campos), en el formato de QuizApp.record_changes, que aplicada en orden
+    convierte el banco viejo en el nuevo; moved[i] es la posición nueva de
+    la pregunta vieja i (None si se eliminó).
+    """
+
+    def __init__(self, changes, moved, added, edited, removed):
+        self.changes = changes
+        self.moved = moved
+        self.added = added
+        self.edited = edited
+        self.removed = removed
+
+    def __bool__(self):
+        return bool(self.changes)
+
+    def position(self, i):
+        return self.moved[i] if 0 <= i < len(self.moved) else None
+
+    def summary(self):
+        if not self.changes:
+            return "sin cambios"
+        parts = [f"{count} {label}" for count, label in ((self.added, "añadidas"), (self.edited, "modificadas"),
+                                                         (self.removed, "eliminadas")) if count]
+        return ", ".join(parts) or "preguntas reordenadas"
+
+
+def diff_banks(old, new):
+    """
+    Diferencias entre dos listas de preguntas. Cada pregunta nueva se empareja
+    con una vieja de contenido idéntico (en orden, para los duplicados); las
+    que quedan sin pareja cuentan como modificadas si ocupan el mismo hueco
+    entre preguntas emparejadas y si no como eliminadas o añadidas. Las
+    operaciones van en este orden: edit (índices viejos), delete (de mayor a
+    menor), add y, si el orden final no coincide, un único reorder.
+    """
+    moved = [None] * len(old)
+    source = [None] * len(new)
+    # el principio y el final comunes se emparejan por igualdad directa: una
+    # edición típica solo deja sin emparejar un tramo pequeño del medio
+    head = 0
+    limit = min(len(old), len(new))
+    while head < limit and old[head] == new[head]:
+        moved[head] = source[head] = head
+        head += 1
+    tail = 0
+    while tail < limit - head and old[-1 - tail] == new[-1 - tail]:
+        i, j = len(old) - 1 - tail, len(new) - 1 - tail
+        moved[i] = j
+        source[j] = i
+        tail += 1
+    slots = defaultdict(deque)
+    for i in range(head, len(old) - tail):
+        slots[question_key(old[i])].append(i)
+    for j in range(head, len(new) - tail):
+        found = slots.get(question_key(new[j]))
+        if found:
+            i = source[j] = found.popleft()
+            moved[i] = j
+
+    # hueco de cada pregunta sin pareja: la última pregunta vieja emparejada
+    # que la precede (-1 si ninguna); en el banco nuevo, la pareja vieja de
+    # la última pregunta emparejada que la precede
+    gaps = defaultdict(deque)
+    anchor = -1
+    for i, j in enumerate(moved):
+        if j is None:
+            gaps[anchor].append(i)
+        else:
+            anchor = i
+    edits = []
+    added = []
+    anchor = -1
+    for j, i in enumerate(source):
+        if i is not None:
+            anchor = i
+            continue
+        pending = gaps.get(anchor)
+        if pending:
+            i = source[j] = pending.popleft()
+            moved[i] = j
+            edits.append((i, j))
+        else:
+            added.append(j)
+    removed = [i for i, j in enumerate(moved) if j is None]
+
+    changes = [("edit", old[i], {"i": i, "q": new[j]}) for i, j in edits]
+    changes += [("delete", old[i], {"i": i}) for i in reversed(removed)]
+    changes += [("add", None, {"q": new[j]}) for j in added]
+    # tras borrar y añadir quedan las viejas conservadas en su orden y luego
+    # las añadidas; order[j] dice cuál de ellas va en la posición nueva j
+    order = [None] * len(new)
+    kept = 0
+    for j in moved:
+        if j is not None:
+            order[j] = kept
+            kept += 1
+    for k, j in enumerate(added):
+        order[j] = kept + k
+    if any(p != j for j, p in enumerate(order)):
+        changes.append(("reorder", None, {"order": order}))
+    return BankDiff(changes, moved, len(added), len(edits), len(removed))